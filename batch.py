@@ -0,0 +1,146 @@
+"""
+Solve many boards and screenshots offline, without Telegram.
+
+Inputs are text boards (sides separated by spaces, dashes or newlines,
+e.g. "CMU-ZOH-SBI-RAN"), text files with one board per line, screenshots,
+or directories of screenshots; "-" reads boards from stdin. They are solved
+in a process pool, and results are written as JSON Lines as soon as they
+are ready, with throughput reported at the end.
+
+    python batch.py boards.txt examples/ -o results.jsonl
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Union
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+
+
+def read_inputs(args: list[str]) -> Iterator[tuple[str, str]]:
+    """
+    ("board" or "image", board or path) for every input
+    """
+    for arg in args:
+        path = Path(arg)
+        if arg == "-":
+            yield from (("board", line.strip()) for line in sys.stdin if line.strip())
+        elif path.is_dir():
+            for file in sorted(path.rglob("*")):
+                if file.suffix.lower() in IMAGE_SUFFIXES:
+                    yield "image", str(file)
+        elif path.suffix.lower() in IMAGE_SUFFIXES:
+            yield "image", arg
+        elif path.is_file():
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        yield "board", line
+        else:
+            yield "board", arg
+
+
+def board_lines(board: str) -> str:
+    """
+    Board with one side per line, as `puzzle_from_string` expects it
+    """
+    return "\n".join(side for side in re.split(r"[\W\d_]+", board) if side)
+
+
+def init_worker() -> None:
+    # dictionary indexes are memory-mapped, so workers share their pages
+    from solver import load_dictionaries
+
+    load_dictionaries()
+
+
+def process(
+    task: tuple[int, str, str, tuple[int, int], Union[int, None], Union[str, None], Union[str, None]],
+) -> dict:
+    from ocr import process_image
+    from solver import solve
+
+    index, kind, value, accepted_len, limit, ranking, dictionary = task
+    result = {"index": index, "input": value}
+    start = time.perf_counter()
+    try:
+        if kind == "image":
+            with open(value, "rb") as f:
+                _, text = process_image(f)
+            result["ocr_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            if not text:
+                raise ValueError("no letters found")
+        else:
+            text = board_lines(value)
+        result["board"] = text.replace("\n", "-")
+
+        solve_start = time.perf_counter()
+        len_threshold, count, solutions = solve(
+            text, accepted_len, limit=limit, ranking=ranking, dictionary=dictionary
+        )
+        result["solve_ms"] = round((time.perf_counter() - solve_start) * 1000, 3)
+        # every solution is a list of word groups, any word of a group fits
+        result.update(words=len_threshold, count=count, solutions=solutions)
+    except Exception as e:
+        result["error"] = f"{e.__class__.__name__}: {e}"
+    result["total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python batch.py", description=__doc__.split("\n\n")[0])
+    parser.add_argument("inputs", nargs="+", help="boards, board files, screenshots or directories, - for stdin")
+    parser.add_argument("-o", "--output", help="JSON Lines file to write (default stdout)")
+    parser.add_argument("-p", "--processes", type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--min-words", type=int, default=3, help="fewest words in a solution (default 3)")
+    parser.add_argument("--max-words", type=int, default=6, help="most words in a solution (default 6)")
+    parser.add_argument("--limit", type=int, default=20, help="solutions per board, 0 for all (default 20)")
+    parser.add_argument("--ranking", default="letters", help="solution ranking, empty for none (default letters)")
+    parser.add_argument("--dictionary", help="dictionary to solve with, see SOLVER_DICTIONARIES")
+    parser.add_argument("--ordered", action="store_true", help="write results in input order")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    tasks = [
+        (
+            i,
+            kind,
+            value,
+            (args.min_words, args.max_words),
+            args.limit or None,
+            args.ranking or None,
+            args.dictionary,
+        )
+        for i, (kind, value) in enumerate(read_inputs(args.inputs))
+    ]
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    errors = 0
+    try:
+        init_worker()
+        with multiprocessing.Pool(args.processes, initializer=init_worker) as pool:
+            imap = pool.imap if args.ordered else pool.imap_unordered
+            for result in imap(process, tasks, chunksize=1):
+                errors += "error" in result
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(tasks)} boards in {elapsed:.2f}s, {len(tasks) / elapsed:.1f} boards/s, {errors} errors",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
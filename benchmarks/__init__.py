@@ -0,0 +1,6 @@
+"""
+Offline benchmarks of the OCR and solver pipelines.
+
+    python -m benchmarks.run           # compare with benchmarks/baseline.json
+    python -m benchmarks.run --save    # record a new baseline
+"""
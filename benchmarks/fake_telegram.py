@@ -0,0 +1,177 @@
+"""
+Fake Telegram for trying the bot in webhook mode locally.
+
+Serves the part of the Bot API the bot uses (photos are served from local
+images, replies are recorded), and posts photo updates to the bot webhook,
+reporting how fast updates are acknowledged and answered.
+
+    BOT_MODE=webhook TELEGRAM_API_TOKEN=123:fake TELEGRAM_API_SERVER=http://127.0.0.1:8081 \\
+        python main.py
+    python -m benchmarks.fake_telegram examples/*.jpg examples/*.png --updates 12 --chats 3
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Union
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+from PIL import Image
+
+
+class FakeTelegram:
+    """
+    Bot API server answering bot requests, with one file per image
+    """
+    def __init__(self, images: list[Path]):
+        self.images = images
+        self.message_id = 1_000_000
+        # update message id -> times replies to it were sent
+        self.replies = {}
+        self.replied = asyncio.Condition()
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=32 * 2**20)
+        app.router.add_post("/bot{token}/{method}", self.handle_method)
+        app.router.add_get("/file/bot{token}/photos/{index}", self.handle_file)
+        return app
+
+    async def handle_file(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.images[int(request.match_info["index"])].read_bytes())
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+
+        if method == "getFile":
+            index = int(params["file_id"].removeprefix("photo"))
+            result = {
+                "file_id": params["file_id"],
+                "file_unique_id": f"unique{index}",
+                "file_size": self.images[index].stat().st_size,
+                "file_path": f"photos/{index}",
+            }
+        elif method in ("sendMessage", "sendPhoto"):
+            await self._record_reply(params)
+            self.message_id += 1
+            result = {
+                "message_id": self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+                "text": str(params.get("text", "")),
+            }
+        elif method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "letterboxed", "username": "fake_bot"}
+        else:
+            # sendChatAction, setWebhook, deleteWebhook, ...
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def _record_reply(self, params: dict) -> None:
+        reply_to = params.get("reply_to_message_id")
+        if reply_to is None and "reply_parameters" in params:
+            reply_to = json.loads(params["reply_parameters"])["message_id"]
+        if reply_to is None:
+            return
+        async with self.replied:
+            self.replies.setdefault(int(reply_to), []).append(time.perf_counter())
+            self.replied.notify_all()
+
+
+def photo_update(update_id: int, chat_id: int, image: int, size: tuple[int, int]) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"},
+            "photo": [
+                {
+                    "file_id": f"photo{image}",
+                    "file_unique_id": f"unique{image}",
+                    "width": size[0],
+                    "height": size[1],
+                }
+            ],
+        },
+    }
+
+
+def percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "-"
+    p50, p90, p100 = np.percentile(np.array(samples) * 1000, (50, 90, 100))
+    return f"p50 {p50:.0f} ms, p90 {p90:.0f} ms, max {p100:.0f} ms"
+
+
+async def post_updates(
+    fake: FakeTelegram,
+    webhook: str,
+    updates: int,
+    chats: int,
+    secret: Union[str, None],
+    timeout: float,
+) -> None:
+    sizes = [Image.open(path).size for path in fake.images]
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    sent = {}
+    acks = []
+
+    async def post(session: aiohttp.ClientSession, update_id: int) -> None:
+        image = update_id % len(fake.images)
+        update = photo_update(update_id, 1 + update_id % chats, image, sizes[image])
+        start = time.perf_counter()
+        sent[update_id] = start
+        async with session.post(webhook, json=update, headers=headers) as response:
+            await response.read()
+            response.raise_for_status()
+        acks.append(time.perf_counter() - start)
+
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(post(session, update_id) for update_id in range(1, updates + 1)))
+    print(f"{updates} updates acknowledged: {percentiles(acks)}")
+
+    # an update is answered with a photo of recognized letters and the solutions,
+    # or with a single message when something went wrong
+    def answered() -> bool:
+        return all(len(fake.replies.get(update_id, ())) >= 2 for update_id in sent)
+
+    async with fake.replied:
+        try:
+            await asyncio.wait_for(fake.replied.wait_for(answered), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    first = [fake.replies[u][0] - start for u, start in sent.items() if u in fake.replies]
+    last = [fake.replies[u][-1] - start for u, start in sent.items() if u in fake.replies]
+    print(f"{len(first)} updates answered: first reply {percentiles(first)}")
+    print(f"last reply {percentiles(last)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.fake_telegram", description=__doc__.split("\n\n")[0])
+    parser.add_argument("images", nargs="+", type=Path, help="screenshots sent as photos")
+    parser.add_argument("--webhook", default="http://127.0.0.1:8800/webhook", help="bot webhook URL")
+    parser.add_argument("--api-port", type=int, default=8081, help="port of the fake Bot API")
+    parser.add_argument("--updates", type=int, default=10, help="number of photos to send")
+    parser.add_argument("--chats", type=int, default=3, help="number of chats sending them")
+    parser.add_argument("--secret", help="webhook secret token of the bot")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for replies")
+    args = parser.parse_args()
+
+    fake = FakeTelegram(args.images)
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.api_port).start()
+    try:
+        await post_updates(fake, args.webhook, args.updates, args.chats, args.secret, args.timeout)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,282 @@
+"""
+Run the benchmarks and compare results with the saved baseline.
+
+Every example image goes through `ocr.process_image` and every board in
+`boards.txt` through `solver.solve` with the bot settings and with the fewest
+words allowed. Each case is repeated to get latency percentiles per stage,
+then run once more under `tracemalloc` for peak memory and the number of
+memory blocks it leaves allocated.
+
+The process exits with status 1 if the median latency or peak memory of
+any case exceeds the baseline by more than the threshold. Latencies are
+compared relative to a calibration workload timed with every run, so that a
+baseline recorded on a faster or slower machine still applies; baselines
+from another Python version, architecture or OCR backend are only reported.
+"""
+import argparse
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from .stages import StageTimer
+
+ROOT = Path(__file__).resolve().parent.parent
+EXAMPLES_DIR = ROOT / "examples"
+BOARDS_PATH = Path(__file__).with_name("boards.txt")
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# (accepted_len, limit, seed, ranking) of solve runs, the first one is what the bot uses
+SOLVE_SETTINGS = {
+    "bot": ((3, 6), 20, 42, "letters"),
+    "fewest": ((1, 6), 20, 42, None),
+}
+PERCENTILES = (50, 90, 100)
+# meta fields that must match the baseline for its numbers to be comparable
+COMPARABLE_META = ("python", "machine", "ocr_backend")
+
+
+def read_boards(path: Path = BOARDS_PATH) -> list[str]:
+    with open(path) as file:
+        lines = (line.strip() for line in file)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def measure(func: Callable[[], object], timer: StageTimer, repeat: int) -> dict:
+    """
+    Latency percentiles of `func` and its stages in milliseconds,
+    peak traced memory in MB and memory blocks left allocated by one run
+    """
+    func()  # warm up lazily built caches
+    totals = []
+    with timer:
+        for _ in range(repeat):
+            timer.start_run()
+            start = time.perf_counter_ns()
+            func()
+            totals.append((time.perf_counter_ns() - start) / 1e6)
+            timer.end_run()
+
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+
+    stages = {"total": totals, **timer.samples}
+    return {
+        "latency_ms": {
+            name: {f"p{q}": round(float(np.percentile(samples, q)), 3) for q in PERCENTILES}
+            for name, samples in stages.items()
+        },
+        "peak_mb": round(peak / 2**20, 3),
+        "retained_blocks": sys.getallocatedblocks() - blocks,
+    }
+
+
+def bench_ocr(repeat: int) -> dict[str, dict]:
+    from ocr import ocr
+
+    results = {}
+    for path in sorted(EXAMPLES_DIR.iterdir()):
+        data = path.read_bytes()
+        timer = StageTimer(
+            {
+                name: (ocr, name)
+                for name in (
+                    "load_image",
+                    "find_template",
+                    "crop_image",
+                    "extract_image_regions",
+                    "ocr_letters",
+                    "stack_region_images",
+                    "imgarray2bytesio",
+                )
+            }
+        )
+        results[f"ocr/{path.name}"] = measure(
+            lambda: ocr.process_image(io.BytesIO(data)), timer, repeat
+        )
+    return results
+
+
+def bench_solver(repeat: int) -> dict[str, dict]:
+    from solver import solver
+    from solver.cache import SolutionCache
+    from solver.dictionary import load_dictionary
+
+    load_dictionary()
+    results = {}
+    # every run has to solve the board, not read it from the cache
+    cache, solver.solution_cache = solver.solution_cache, SolutionCache(maxsize=0)
+    try:
+        for board in read_boards():
+            for setting, (accepted_len, limit, seed, ranking) in SOLVE_SETTINGS.items():
+                timer = StageTimer(
+                    {
+                        "init": (solver.LetterBoxed, "__init__"),
+                        "deepen": (solver.LetterBoxed, "deepen"),
+                        "count_solutions": (solver.LetterBoxed, "count_solutions"),
+                        "sample_solutions": (solver.LetterBoxed, "sample_solutions"),
+                        "rank_solutions": (solver.LetterBoxed, "rank_solutions"),
+                    }
+                )
+                puzzle = board.replace(" ", "\n")
+                name = f"solve/{board.replace(' ', '-')}/{setting}"
+                results[name] = measure(
+                    lambda: solver.solve(
+                        puzzle, accepted_len, limit=limit, seed=seed, ranking=ranking
+                    ),
+                    timer,
+                    repeat,
+                )
+    finally:
+        solver.solution_cache = cache
+    return results
+
+
+def calibrate(repeat: int = 5) -> float:
+    """
+    Milliseconds taken by a fixed mix of interpreted loops and numpy work,
+    like the solver and OCR do, best of `repeat` runs
+    """
+    image = np.random.default_rng(0).random((512, 512))
+
+    def work() -> None:
+        total = 0
+        for i in range(300_000):
+            total += i * i % 7
+        sorted(range(200_000), key=lambda x: -x)
+        np.fft.irfft2(np.fft.rfft2(image), image.shape)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        work()
+        times.append((time.perf_counter_ns() - start) / 1e6)
+    return min(times)
+
+
+def mismatched_meta(meta: dict, baseline_meta: dict) -> list[str]:
+    """
+    Descriptions of meta fields in which this run differs from the baseline
+    """
+    return [
+        f"{field} {meta.get(field)}, baseline {baseline_meta.get(field)}"
+        for field in COMPARABLE_META
+        if meta.get(field) != baseline_meta.get(field)
+    ]
+
+
+def compare(results: dict, baseline: dict, threshold: float, speed: float = 1.0) -> list[str]:
+    """
+    Descriptions of cases slower or using more memory than the baseline allows,
+    with baseline latencies multiplied by `speed`, the relative calibration time
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        checks = (
+            ("p50 latency", result["latency_ms"]["total"]["p50"], base["latency_ms"]["total"]["p50"] * speed, "ms"),
+            ("peak memory", result["peak_mb"], base["peak_mb"], "MB"),
+        )
+        for what, value, limit, unit in checks:
+            if value > limit * (1 + threshold):
+                regressions.append(f"{name}: {what} {value:.2f}{unit}, baseline {limit:.2f}{unit}")
+    return regressions
+
+
+def report(results: dict, baseline: dict, speed: float = 1.0) -> None:
+    print(f"{'case':<36} {'p50 ms':>10} {'p90 ms':>10} {'base p50':>10} {'peak MB':>8} {'blocks':>7}")
+    for name, result in results.items():
+        total = result["latency_ms"]["total"]
+        base = baseline.get(name, {}).get("latency_ms", {}).get("total", {}).get("p50")
+        base = f"{base * speed:.1f}" if base is not None else "-"
+        print(
+            f"{name:<36} {total['p50']:>10.1f} {total['p90']:>10.1f} {base:>10} "
+            f"{result['peak_mb']:>8.1f} {result['retained_blocks']:>7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", choices=("ocr", "solver"), help="run only one pipeline")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (default 5)")
+    parser.add_argument(
+        "--threshold", type=float, default=0.5,
+        help="allowed relative regression of latency and memory (default 0.5)",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="save results as the new baseline")
+    parser.add_argument(
+        "--ocr-backend", default="glyphs",
+        help="OCR backend, the default one does not need tesseract (default glyphs)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    os.environ["OCR_BACKEND"] = args.ocr_backend
+
+    # timed before and after, the faster one is closer to what the cases got
+    calibration = calibrate()
+    results = {}
+    if args.only in (None, "ocr"):
+        results.update(bench_ocr(args.repeat))
+    if args.only in (None, "solver"):
+        results.update(bench_solver(args.repeat))
+    calibration = min(calibration, calibrate())
+    meta = {
+        "python": ".".join(platform.python_version_tuple()[:2]),
+        "machine": platform.machine(),
+        "ocr_backend": args.ocr_backend,
+        "repeat": args.repeat,
+        "calibration_ms": round(calibration, 3),
+    }
+
+    baseline, baseline_meta = {}, {}
+    if args.baseline.exists():
+        with open(args.baseline) as file:
+            data = json.load(file)
+        baseline, baseline_meta = data["cases"], data["meta"]
+    # baseline latencies as they would be on this machine
+    speed = calibration / baseline_meta["calibration_ms"] if "calibration_ms" in baseline_meta else 1.0
+    print(f"calibration {calibration:.1f}ms, {speed:.2f}x the baseline machine")
+    report(results, baseline, speed)
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump({"meta": meta, "cases": {**baseline, **results}}, file, indent=2)
+            file.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold, speed)
+    if regressions:
+        print("\nregressions:")
+        print("\n".join(regressions))
+    mismatches = []
+    if baseline:
+        mismatches = mismatched_meta(meta, baseline_meta)
+        if "calibration_ms" not in baseline_meta:
+            mismatches.append("baseline has no calibration time")
+    if mismatches:
+        print(f"\nnot comparable with the baseline, not failing: {'; '.join(mismatches)}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
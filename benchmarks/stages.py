@@ -0,0 +1,47 @@
+import time
+from functools import wraps
+from typing import Callable
+
+
+class StageTimer:
+    """
+    Measures time spent in functions and methods while active.
+
+    `targets` maps stage names to (owner, attribute) pairs: the attribute is
+    replaced by a timing wrapper on enter and restored on exit. Time of all
+    calls made during one run is summed, so stages called repeatedly
+    (e.g. every deepening step) are reported once per run.
+    """
+    def __init__(self, targets: dict[str, tuple[object, str]]):
+        self.targets = targets
+        self.samples = {name: [] for name in targets}
+        self._current = {}
+        self._originals = {}
+
+    def __enter__(self) -> "StageTimer":
+        for name, (owner, attribute) in self.targets.items():
+            original = getattr(owner, attribute)
+            self._originals[name] = original
+            setattr(owner, attribute, self._wrap(name, original))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for name, (owner, attribute) in self.targets.items():
+            setattr(owner, attribute, self._originals.pop(name))
+
+    def _wrap(self, name: str, func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._current[name] = self._current.get(name, 0) + time.perf_counter_ns() - start
+        return wrapper
+
+    def start_run(self) -> None:
+        self._current = {}
+
+    def end_run(self) -> None:
+        for name in self.targets:
+            self.samples[name].append(self._current.get(name, 0) / 1e6)
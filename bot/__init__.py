@@ -1,5 +1,6 @@
 from .bot import bot
 from .handlers import main_router
 from .default import default_router
+from .workers import worker_pool
 
-__all__ = ["bot", "main_router", "default_router"]
\ No newline at end of file
+__all__ = ["bot", "main_router", "default_router", "worker_pool"]
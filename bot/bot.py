@@ -2,13 +2,22 @@ import os
 
 from aiogram import Bot, enums
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from dotenv import load_dotenv
 
 load_dotenv()
 
 TELEGRAM_API_TOKEN = os.getenv("TELEGRAM_API_TOKEN")
+# another Bot API server, e.g. a self-hosted one or `benchmarks.fake_telegram`
+TELEGRAM_API_SERVER = os.getenv("TELEGRAM_API_SERVER")
 
 bot = Bot(
     token=TELEGRAM_API_TOKEN,
+    session=(
+        AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_SERVER))
+        if TELEGRAM_API_SERVER
+        else None
+    ),
     default=DefaultBotProperties(parse_mode=enums.ParseMode.HTML),
 )
@@ -1,26 +1,128 @@
-import io
+import asyncio
+import hashlib
+import html
 import logging
-import random
+import os
 
 from aiogram import Bot, F, Router, types
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
 from aiogram.utils.chat_action import ChatActionMiddleware
 
-from ocr import process_image
-from solver import solve
+from metrics import new_trace_id, registry, stage_timer
+import ocr
+from solver import DICTIONARIES, solution_cache, solution_key, solve, store_solution
+from solver.cache import canonical_board
+from solver.dictionary import DEFAULT_DICTIONARY
+from solver.solver import puzzle_from_string
+
+from .limits import ConcurrencyLimitMiddleware
+from .singleflight import SingleFlight
+from .workers import WorkerPoolBusy, worker_pool
+
+BUSY_REPLY = "Сейчас слишком много запросов, попробуй прислать скриншот чуть позже"
+
+# how solutions to show are picked, see `solver.ranking`; empty for a random sample
+SOLUTION_RANKING = os.getenv("SOLVER_RANKING", "letters") or None
+# solutions with up to this many words are shown even if shorter ones exist
+SOLUTION_MIN_WORDS = int(os.getenv("SOLVER_MIN_WORDS", 3))
+
+PHOTOS = registry.counter("letterboxed_photos_total", "Photos received")
+FAILURES = registry.counter(
+    "letterboxed_failures_total", "Photos that could not be recognized or solved", ("stage", "reason")
+)
+
+# concurrent photos of the same file share one download, photos with the same
+# content share one recognition, and the same boards share one solve
+downloads = SingleFlight("download")
+recognitions = SingleFlight("ocr")
+solutions = SingleFlight("solve")
 
 main_router = Router()
+main_router.message.middleware(ConcurrencyLimitMiddleware.from_env())
 main_router.message.middleware(ChatActionMiddleware())
 
 
+async def download_photo(bot: Bot, file_id: str) -> bytes:
+    with stage_timer("download"):
+        file = await bot.get_file(file_id)
+        image = await bot.download_file(file.file_path)
+    return image.getvalue()
+
+
+def board_key(text: str) -> str:
+    """
+    Boards that differ only in order of sides or letters are solved the same
+    """
+    try:
+        return canonical_board(puzzle_from_string(text))
+    except ValueError:
+        return text
+
+
+async def solve_board(text: str, dictionary: str) -> tuple[int, int, list]:
+    """
+    Solve the board in a worker, unless it is in the solution cache of this process.
+    Workers do not keep their own cache, so every solved board is cached here once.
+    The cache may read and write its SQLite file, so it is used off the event loop
+    """
+    args = (text, (SOLUTION_MIN_WORDS, 6))
+    kwargs = dict(limit=20, seed=42, ranking=SOLUTION_RANKING, dictionary=dictionary)
+    key = solution_key(*args, **kwargs)
+    cached = await asyncio.to_thread(solution_cache.get, key)
+    if cached is not None:
+        return tuple(cached)
+
+    result = await worker_pool.run(solve, *args, **kwargs, cache=False)
+    await asyncio.to_thread(store_solution, key, result)
+    return result
+
+
+@main_router.message(Command("dictionary"))
+async def handle_dictionary(message: types.Message, command: CommandObject, state: FSMContext) -> None:
+    """
+    /dictionary lists dictionaries, /dictionary NAME picks one for this user in this chat.
+    The choice lives in FSM storage, which is in memory of this process
+    """
+    name = (command.args or "").strip()
+    if not name:
+        current = (await state.get_data()).get("dictionary", DEFAULT_DICTIONARY)
+        names = "\n".join(
+            f"{'• ' if dictionary == current else '  '}<code>{dictionary}</code>"
+            for dictionary in DICTIONARIES
+        )
+        await message.reply(f"Доступные словари:\n{names}\n\nВыбрать: /dictionary название")
+    elif name not in DICTIONARIES:
+        await message.reply(f"Словарь <code>{html.escape(name)}</code> не найден, список словарей: /dictionary")
+    else:
+        await state.update_data(dictionary=name)
+        await message.reply(f"Теперь решения ищутся по словарю <code>{name}</code>")
+
+
 @main_router.message(F.photo)
-async def handle_docs_photo(message: types.Message, bot: Bot) -> None:
-    file = await bot.get_file(message.photo[-1].file_id)
-    image: io.BytesIO = await bot.download_file(file.file_path)
+async def handle_docs_photo(message: types.Message, bot: Bot, state: FSMContext) -> None:
+    trace = new_trace_id()
+    PHOTOS.inc()
+    logging.info(f"photo from chat {message.chat.id}, trace={trace}")
+
+    photo = message.photo[-1]
+    image = await downloads.run(photo.file_unique_id, download_photo, bot, photo.file_id)
 
     try:
-        ocr_image, ocr_text = await process_image(image)
+        ocr_image, ocr_text = await recognitions.run(
+            hashlib.sha256(image).digest(), worker_pool.run, ocr.process_image, image
+        )
+    except WorkerPoolBusy:
+        FAILURES.inc(stage="ocr", reason="busy")
+        await message.reply(BUSY_REPLY)
+        return
+    except asyncio.TimeoutError:
+        FAILURES.inc(stage="ocr", reason="timeout")
+        await message.reply("Распознавание заняло слишком много времени :(")
+        return
     except Exception as e:
-        logging.exception(e)
+        FAILURES.inc(stage="ocr", reason="error")
+        logging.exception(f"recognition failed, trace={trace}: {e}")
         await message.reply(f"Во время распознавания произошла ошибка: {e}")
         return
 
@@ -35,9 +137,12 @@ async def handle_docs_photo(message: types.Message, bot: Bot) -> None:
         else "Буквы не найдены :(\n\nПопробуй снять скриншот иначе"
     )
 
-    if ocr_image.getbuffer().nbytes:
+    # BufferedInputFile wants bytes; getvalue() returns the same bytes for every
+    # photo sharing this image, and aiogram reads them without another copy
+    preview = ocr_image.getvalue()
+    if preview:
         await message.reply_photo(
-            types.BufferedInputFile(ocr_image.read(), "image_ocr.png"),
+            types.BufferedInputFile(preview, "image_ocr.png"),
             caption=reply_text,
             parse_mode="HTML",
         )
@@ -45,26 +150,44 @@ async def handle_docs_photo(message: types.Message, bot: Bot) -> None:
         await message.reply(reply_text, parse_mode="HTML")
 
     if not ocr_text:
+        FAILURES.inc(stage="ocr", reason="no_letters")
+        return
+    try:
+        puzzle_from_string(ocr_text)
+    except ValueError as e:
+        # unrecognized letters or a wrong number of them, there is nothing to solve
+        FAILURES.inc(stage="ocr", reason="invalid_board")
+        logging.info(f"not solving {ocr_text!r}, trace={trace}: {e}")
+        await message.reply("Не все буквы удалось распознать, попробуй снять скриншот ещё раз")
         return
 
+    dictionary = (await state.get_data()).get("dictionary", DEFAULT_DICTIONARY)
     try:
-        solutions_nword, solutions_n, solutions = solve(ocr_text, (3, 6))
+        solutions_nword, solutions_n, board_solutions = await solutions.run(
+            (board_key(ocr_text), dictionary), solve_board, ocr_text, dictionary
+        )
+    except WorkerPoolBusy:
+        FAILURES.inc(stage="solve", reason="busy")
+        await message.reply(BUSY_REPLY)
+        return
+    except asyncio.TimeoutError:
+        FAILURES.inc(stage="solve", reason="timeout")
+        await message.reply("Решение заняло слишком много времени :(")
+        return
     except Exception as e:
-        logging.exception(e)
+        FAILURES.inc(stage="solve", reason="error")
+        logging.exception(f"solving failed, trace={trace}: {e}")
         await message.reply(f"Во время решения произошла ошибка: {e}")
         return
 
     if not solutions_n:
+        FAILURES.inc(stage="solve", reason="no_solution")
         await message.reply("Решение не найдено :(")
         return
 
     solution_text = f"Решения за {solutions_nword} слова:"
 
-    random.seed(42)
-    random.shuffle(solutions)
-    solutions = solutions[:20]
-
-    for i, solution in enumerate(solutions, start=1):
+    for i, solution in enumerate(board_solutions, start=1):
         solution = "-".join(w[0] for w in solution)
         solution_text += f"\n{i}. {solution}"
 
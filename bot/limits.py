@@ -0,0 +1,79 @@
+import asyncio
+import os
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Union
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject
+
+from metrics import registry
+
+ACTIVE = registry.gauge("letterboxed_handlers_active", "Messages being handled")
+WAITING = registry.gauge("letterboxed_handlers_waiting", "Messages waiting for a concurrency slot")
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Lets at most `global_limit` messages be handled at once, and at most
+    `per_chat_limit` of them from the same chat (no limit when `None`).
+    Further messages wait for a slot, so one chat sending many photos
+    cannot take all workers from the others.
+    """
+    def __init__(self, global_limit: Union[int, None] = None, per_chat_limit: Union[int, None] = 1):
+        self.global_limit = global_limit
+        self.per_chat_limit = per_chat_limit
+        self._global = asyncio.Semaphore(global_limit) if global_limit else nullcontext()
+        # chat id -> [semaphore, messages holding or waiting for it]
+        self._chats = {}
+        self.waiting = 0
+        self.active = 0
+
+    @classmethod
+    def from_env(cls) -> "ConcurrencyLimitMiddleware":
+        return cls(
+            global_limit=int(os.getenv("MAX_CONCURRENT_UPDATES", "0")) or None,
+            per_chat_limit=int(os.getenv("MAX_CONCURRENT_PER_CHAT", "1")) or None,
+        )
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        chat_id = event.chat.id if isinstance(event, Message) else None
+        waiting = True
+        self._count(waiting=1)
+        try:
+            async with self._chat_semaphore(chat_id), self._global:
+                waiting = False
+                self._count(waiting=-1, active=1)
+                try:
+                    return await handler(event, data)
+                finally:
+                    self._count(active=-1)
+        finally:
+            if waiting:
+                self._count(waiting=-1)
+            self._release_chat(chat_id)
+
+    def _chat_semaphore(self, chat_id: Union[int, None]) -> Union[asyncio.Semaphore, nullcontext]:
+        if chat_id is None or not self.per_chat_limit:
+            return nullcontext()
+        entry = self._chats.setdefault(chat_id, [asyncio.Semaphore(self.per_chat_limit), 0])
+        entry[1] += 1
+        return entry[0]
+
+    def _release_chat(self, chat_id: Union[int, None]) -> None:
+        # semaphores are dropped once no message of the chat needs them
+        entry = self._chats.get(chat_id)
+        if entry is not None:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chats[chat_id]
+
+    def _count(self, waiting: int = 0, active: int = 0) -> None:
+        self.waiting += waiting
+        self.active += active
+        WAITING.set(self.waiting)
+        ACTIVE.set(self.active)
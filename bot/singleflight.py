@@ -0,0 +1,41 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from metrics import registry
+
+COALESCED = registry.counter(
+    "letterboxed_coalesced_total", "Jobs that joined an identical job already in flight", ("job",)
+)
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in-flight call: the first one
+    starts it, the others wait for its result (or exception) instead of
+    repeating the work. The key is forgotten as soon as the call finishes,
+    so results are not cached here.
+
+    A waiter being cancelled does not cancel the shared call for the others.
+    """
+    def __init__(self, job: str):
+        self.job = job
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, func: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            COALESCED.inc(job=self.job)
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        del self._calls[key]
+        # mark the exception retrieved, in case every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
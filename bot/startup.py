@@ -0,0 +1,97 @@
+"""
+Warm-up before the bot starts taking updates.
+
+Heavy modules (scikit-image for OCR) are only imported on first use, so
+without a warm-up the first photos pay for imports, reading dictionary
+indexes, rescaling the board template and setting up the OCR backend.
+`warm_up` does all of that once in the main process and records how long
+every stage took; worker processes do the same with `warm_up_worker` as
+they start.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+from metrics import registry
+
+STARTUP_SECONDS = registry.gauge(
+    "letterboxed_startup_seconds", "Time taken by startup stages", ("stage",)
+)
+
+# solved once during warm-up, a board with a few thousand solutions
+WARM_UP_BOARD = "CMU\nZOH\nSBI\nRAN"
+
+
+@contextmanager
+def _stage(timings: dict[str, float], stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+    STARTUP_SECONDS.set(timings[stage], stage=stage)
+
+
+def _synthetic_screenshot(template: np.ndarray) -> bytes:
+    """
+    PNG of the board template alone on a white background
+    """
+    from ocr.utils import imgarray2bytesio
+
+    height, width = template.shape
+    image = np.ones((2 * height, 2 * width))
+    image[height // 2 : height // 2 + height, width // 2 : width // 2 + width] = template
+    return imgarray2bytesio(image).getvalue()
+
+
+def warm_up_worker() -> None:
+    """
+    Load what every OCR and solving job needs, before a worker takes its first job
+    """
+    from ocr.backends import get_backend
+    from ocr.ocr import precompute_template
+    from solver import load_dictionaries
+
+    load_dictionaries()
+    precompute_template()
+    get_backend()
+
+
+def warm_up() -> dict[str, float]:
+    """
+    Import OCR and solver modules, load all dictionaries, rescale the template,
+    set up the OCR backend, run OCR on a synthetic screenshot and solve one
+    board the way the bot does. Returns seconds per stage.
+    """
+    timings = {}
+    with _stage(timings, "import"):
+        from ocr.backends import get_backend
+        from ocr.ocr import get_template, precompute_template, process_image
+        from solver import load_dictionaries, solve
+
+        from .handlers import SOLUTION_MIN_WORDS, SOLUTION_RANKING
+
+    with _stage(timings, "dictionary"):
+        dictionaries = load_dictionaries()
+    for name, dictionary in dictionaries.items():
+        storage = "mapped" if dictionary.mapped else "in memory"
+        logging.info(
+            f"dictionary {name}: {dictionary.word_count} words, "
+            f"{dictionary.nbytes / 2**20:.1f} MB {storage}, {dictionary.path}"
+        )
+    with _stage(timings, "template"):
+        precompute_template()
+    with _stage(timings, "ocr_backend"):
+        get_backend()
+    with _stage(timings, "ocr"):
+        # scikit-image loads most of its submodules on first use
+        process_image(_synthetic_screenshot(get_template().template))
+    with _stage(timings, "solve"):
+        solve(WARM_UP_BOARD, (SOLUTION_MIN_WORDS, 6), limit=20, seed=42, ranking=SOLUTION_RANKING)
+
+    logging.info(
+        f"warmed up in {sum(timings.values()):.2f}s: "
+        + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+    )
+    return timings
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import os
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+# public base URL Telegram should send updates to, the webhook is not registered if empty
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8800"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+# seconds to let updates being handled finish on SIGTERM or SIGINT
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "8"))
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Receive updates on an aiohttp server until SIGTERM or SIGINT.
+
+    Updates are acknowledged as soon as they are parsed and handled in
+    background tasks, so Telegram never waits for OCR or solving and does not
+    redeliver slow updates. Nothing but the /dictionary choice is kept
+    between updates, so several replicas can run behind one load balancer.
+
+    On a signal the server stops taking updates, and those being handled get
+    `SHUTDOWN_TIMEOUT` seconds to finish before they are cancelled.
+    """
+    app = web.Application()
+    handler = SimpleRequestHandler(
+        dispatcher=dp, bot=bot, handle_in_background=True, secret_token=WEBHOOK_SECRET
+    )
+    handler.register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+        await site.start()
+        logging.info(f"listening for updates on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        if WEBHOOK_URL:
+            # updates queued by Telegram are kept, they may be meant for other replicas
+            await bot.set_webhook(f"{WEBHOOK_URL}{WEBHOOK_PATH}", secret_token=WEBHOOK_SECRET)
+        await stop.wait()
+
+        # the bot session is closed with the app, so replies are sent before that
+        await site.stop()
+        # aiogram keeps the tasks of updates handled in background in this set
+        await _finish_updates(handler._background_feed_update_tasks, SHUTDOWN_TIMEOUT)
+    finally:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+        await runner.cleanup()
+
+
+async def _finish_updates(tasks: set[asyncio.Task], timeout: float) -> None:
+    if not tasks:
+        return
+    logging.info(f"stopping, waiting for {len(tasks)} updates being handled")
+    _, pending = await asyncio.wait(set(tasks), timeout=timeout)
+    if pending:
+        logging.warning(f"cancelling {len(pending)} updates still handled after {timeout:g}s")
+        for task in pending:
+            task.cancel()
+        await asyncio.wait(pending)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import signal
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Union
+
+from metrics import registry, run_traced, trace_id
+
+from .startup import warm_up_worker
+
+QUEUE_DEPTH = registry.gauge("letterboxed_worker_queue_depth", "Jobs queued or running in the worker pool")
+JOB_SECONDS = registry.histogram(
+    "letterboxed_worker_job_seconds", "Time from submitting a job to its result, including queueing", ("job",)
+)
+POOL_RESTARTS = registry.counter(
+    "letterboxed_worker_pool_restarts_total", "Worker pools replaced after a worker process died"
+)
+
+# workers are forked from a server process that has imported these already
+WORKER_CONTEXT = multiprocessing.get_context("forkserver")
+WORKER_CONTEXT.set_forkserver_preload(["bot.startup", "ocr.ocr", "ocr.backends", "solver"])
+
+
+class WorkerPoolBusy(Exception):
+    """
+    Raised when too many jobs are already queued in the pool
+    """
+
+
+class WorkerPool:
+    """
+    Process pool for CPU-bound jobs (OCR, solving), so the event loop only does I/O.
+
+    At most `max_pending` jobs may be queued or running at once, further jobs are
+    rejected with `WorkerPoolBusy`. A job that does not finish within `timeout`
+    seconds raises `asyncio.TimeoutError` to the caller; the worker itself keeps
+    running it to completion, and it still counts towards `max_pending` until then.
+
+    Jobs run under the trace id of the caller, and metrics they record in the
+    worker process are merged into the registry of this process when they finish.
+
+    Workers are started by a fork server rather than forked from this process:
+    pools are started and restarted while threads of this process may hold
+    locks (of the solution cache, of metrics), which a forked child would
+    inherit held and wait on forever.
+
+    If a worker process dies (killed when out of memory, crashed in tesseract),
+    jobs queued or running in the pool fail with `BrokenProcessPool`, and the
+    pool is replaced with a new one for the jobs that follow.
+    """
+    def __init__(
+        self,
+        processes: Union[int, None] = None,
+        max_pending: Union[int, None] = None,
+        timeout: Union[float, None] = 60,
+        initializer: Union[Callable[[], None], None] = None,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending or self.processes * 4
+        self.timeout = timeout
+        self.initializer = initializer
+        self.pending = 0
+        self._executor = None
+
+    @classmethod
+    def from_env(cls, initializer: Union[Callable[[], None], None] = None) -> "WorkerPool":
+        timeout = float(os.getenv("WORKER_TIMEOUT", "60"))
+        return cls(
+            processes=int(os.getenv("WORKER_PROCESSES", "0")) or None,
+            max_pending=int(os.getenv("WORKER_QUEUE_SIZE", "0")) or None,
+            timeout=timeout if timeout > 0 else None,
+            initializer=initializer,
+        )
+
+    def start(self) -> None:
+        if self._executor is None:
+            logging.info(f"starting worker pool with {self.processes} processes")
+            # workers are started on the first jobs, the fork server right away
+            multiprocessing.forkserver.ensure_running()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=WORKER_CONTEXT,
+                initializer=partial(_init_worker, self.initializer),
+            )
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        if self.pending >= self.max_pending:
+            raise WorkerPoolBusy(f"{self.pending} jobs already queued")
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        job = partial(run_traced, trace_id.get(), func, *args, **kwargs)
+        executor = self._executor
+        try:
+            future = executor.submit(job)
+        except BrokenProcessPool:
+            # broken while running earlier jobs, which have failed already
+            self._restart(executor)
+            executor = self._executor
+            future = executor.submit(job)
+        self.pending += 1
+        QUEUE_DEPTH.set(self.pending)
+        name = getattr(func, "__name__", type(func).__name__)
+        future.add_done_callback(partial(self._job_done, loop, name, time.perf_counter_ns()))
+
+        # on timeout the job is cancelled if it has not started yet
+        try:
+            result, _ = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+        return result
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        # every job of a broken pool fails with it, only the first one replaces it
+        if self._executor is executor:
+            logging.warning("a worker process died, restarting the worker pool")
+            POOL_RESTARTS.inc()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.start()
+
+    def _job_done(self, loop: asyncio.AbstractEventLoop, job: str, start: int, future: Future) -> None:
+        # done callbacks run in an executor thread, count the job off on the loop
+        JOB_SECONDS.observe((time.perf_counter_ns() - start) / 1e9, job=job)
+        if not future.cancelled() and future.exception() is None:
+            registry.merge(future.result()[1])
+        try:
+            loop.call_soon_threadsafe(self._decrement_pending)
+        except RuntimeError:
+            # loop is already closed
+            pass
+
+    def _decrement_pending(self) -> None:
+        self.pending -= 1
+        QUEUE_DEPTH.set(self.pending)
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting jobs, drop queued ones and wait for running ones to finish
+        """
+        if self._executor is not None:
+            logging.info(f"shutting down worker pool, {self.pending} jobs pending")
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def _init_worker(initializer: Union[Callable[[], None], None]) -> None:
+    # Ctrl-C reaches the whole process group, workers finish their jobs and
+    # leave stopping to the bot process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer()
+
+
+# workers load the dictionary and template when they start
+worker_pool = WorkerPool.from_env(initializer=warm_up_worker)
@@ -1,11 +1,18 @@
 import asyncio
 import logging
+import os
 import sys
 
 from aiogram import Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from bot import bot, main_router, default_router
+from bot import bot, main_router, default_router, worker_pool
+from bot.startup import warm_up
+from bot.webhook import run_webhook
+from metrics.server import READY, start_metrics_server
+
+# "polling" or "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling")
 
 
 async def main() -> None:
@@ -14,8 +21,22 @@ async def main() -> None:
     dp.include_router(main_router)
     dp.include_router(default_router)
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    # metrics are served during warm-up, with /ready answering 503 until it is done
+    metrics_runner = await start_metrics_server()
+    # the worker fork server imports OCR and solver modules alongside the warm-up
+    worker_pool.start()
+    await asyncio.to_thread(warm_up)
+    READY.set(1)
+    try:
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            await dp.start_polling(bot)
+    finally:
+        worker_pool.shutdown()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,15 @@
+from .registry import Counter, Gauge, Histogram, Registry, registry
+from .tracing import new_trace_id, run_traced, stage_timer, timed, trace_id
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "registry",
+    "new_trace_id",
+    "run_traced",
+    "stage_timer",
+    "timed",
+    "trace_id",
+]
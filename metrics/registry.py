@@ -0,0 +1,204 @@
+"""
+Minimal in-process metrics: counters, gauges and histograms with labels,
+rendered in the Prometheus text exposition format.
+"""
+import copy
+import math
+import threading
+from typing import Union
+
+# default histogram buckets in seconds, from 1 ms to a minute
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames and self.type in ("counter", "gauge"):
+            self.values[()] = 0
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{self._labels(key)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = value
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """
+    Values are [bucket counts..., count of values above the last bucket, sum]
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        bucket = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets)
+        )
+        with self._lock:
+            counts = self.values.setdefault(key, [0] * (len(self.buckets) + 2))
+            counts[bucket] += 1
+            counts[-1] += value
+
+    def count(self, **labels) -> int:
+        return sum(self.values.get(self._key(labels), [0])[:-1])
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            for key, counts in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, math.inf), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else _number(bound)
+                    labels = self._labels(key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_number(counts[-1])}")
+                lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Collection of metrics of the process.
+
+    Worker processes send what they recorded during a job back to the main
+    process as a difference of two snapshots, which is merged into its registry.
+    Gauges describe the process itself and are not transferred.
+    """
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, cls: type, name: str, *args, **kwargs) -> Metric:
+        if name not in self.metrics:
+            self.metrics[name] = cls(name, *args, **kwargs)
+        metric = self.metrics[name]
+        if not isinstance(metric, cls):
+            raise ValueError(f"metric {name} is already registered as {metric.type}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def snapshot(self) -> dict[str, dict]:
+        snapshot = {}
+        for name, metric in self.metrics.items():
+            if isinstance(metric, Gauge):
+                continue
+            with metric._lock:
+                snapshot[name] = copy.deepcopy(metric.values)
+        return snapshot
+
+    def diff(self, before: dict[str, dict]) -> dict[str, dict]:
+        """
+        Values recorded since the `before` snapshot
+        """
+        changes = {}
+        for name, values in self.snapshot().items():
+            previous = before.get(name, {})
+            for key, value in values.items():
+                old = previous.get(key)
+                if old == value:
+                    continue
+                if isinstance(value, list):
+                    value = [a - b for a, b in zip(value, old)] if old else value
+                else:
+                    value = value - (old or 0)
+                changes.setdefault(name, {})[key] = value
+        return changes
+
+    def merge(self, changes: dict[str, dict]) -> None:
+        for name, values in changes.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            with metric._lock:
+                for key, value in values.items():
+                    if isinstance(value, list):
+                        counts = metric.values.setdefault(key, [0] * len(value))
+                        metric.values[key] = [a + b for a, b in zip(counts, value)]
+                    else:
+                        metric.values[key] = metric.values.get(key, 0) + value
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: Union[int, float]) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
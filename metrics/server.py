@@ -0,0 +1,48 @@
+"""
+HTTP endpoint serving the metrics registry in Prometheus text format
+"""
+import logging
+import os
+from typing import Union
+
+from aiohttp import web
+
+from .registry import Registry, registry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# set to 1 by the service once it has warmed up, /ready answers 503 until then
+READY = registry.gauge("letterboxed_ready", "1 once the service has warmed up and takes requests")
+
+
+def metrics_app(metrics: Registry = registry) -> web.Application:
+    async def handle_metrics(_: web.Request) -> web.Response:
+        return web.Response(body=metrics.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def handle_ready(_: web.Request) -> web.Response:
+        ready = READY.get() == 1
+        return web.Response(text="ready" if ready else "warming up", status=200 if ready else 503)
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/ready", handle_ready)
+    return app
+
+
+async def start_metrics_server(
+    host: Union[str, None] = None, port: Union[int, None] = None
+) -> Union[web.AppRunner, None]:
+    """
+    Serve /metrics and /ready on `METRICS_HOST`:`METRICS_PORT` (127.0.0.1:9100 by default),
+    port 0 disables the endpoint. Returns the runner to clean up on shutdown.
+    """
+    host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+    port = port if port is not None else int(os.getenv("METRICS_PORT", "9100"))
+    if not port:
+        return None
+
+    runner = web.AppRunner(metrics_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info(f"serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,72 @@
+"""
+Per-request trace ids and stage timing.
+
+The trace id is kept in a context variable, so it follows a request through
+asyncio tasks, and `run_traced` carries it into worker processes together
+with the metrics recorded there.
+"""
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterator, Union
+
+from .registry import registry
+
+trace_id: ContextVar[Union[str, None]] = ContextVar("trace_id", default=None)
+
+STAGE_SECONDS = registry.histogram(
+    "letterboxed_stage_seconds", "Time spent in a processing stage", ("stage",)
+)
+
+
+def new_trace_id() -> str:
+    """
+    Start a new trace in the current context
+    """
+    trace = uuid.uuid4().hex[:12]
+    trace_id.set(trace)
+    return trace
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Record duration of the block in the stage histogram
+    """
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter_ns() - start
+        STAGE_SECONDS.observe(elapsed / 1e9, stage=stage)
+        logging.debug(f"stage={stage} duration_ms={elapsed / 1e6:.3f} trace={trace_id.get()}")
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator recording duration of every call in the stage histogram
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def run_traced(trace: Union[str, None], func: Callable, *args, **kwargs) -> tuple[Any, dict]:
+    """
+    Run `func` under the given trace id, returning its result and the metrics
+    recorded meanwhile, to be merged into the registry of the calling process
+    """
+    before = registry.snapshot()
+    token = trace_id.set(trace)
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        trace_id.reset(token)
+    return result, registry.diff(before)
@@ -1,3 +1,10 @@
-from .ocr import process_image
+__all__ = ["process_image"]
 
-__all__ = ["process_image"]
\ No newline at end of file
+
+def __getattr__(name: str):
+    # scikit-image is imported on first use, not with the package
+    if name == "process_image":
+        from .ocr import process_image
+
+        return process_image
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
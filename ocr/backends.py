@@ -0,0 +1,196 @@
+"""
+OCR backends recognizing a single letter in each of the letter regions.
+
+- "tesseract": one `tesseract` call per region
+- "strip": regions are composed into one strip recognized with a single `tesseract` call
+- "tesserocr": the strip is recognized by a long-lived in-process tesseract engine,
+  requires the optional `tesserocr` package
+- "glyphs": nearest-neighbour match against reference glyphs, no tesseract needed
+"""
+import logging
+import os
+import threading
+from typing import Union
+
+import pytesseract
+from PIL import Image
+
+from .glyphs import GlyphClassifier
+from .imageregion import ImageRegion, strip_region_images
+from .utils import array2image
+
+LANG = "eng"
+CHAR_WHITELIST = "|lckmopsuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ01"
+
+# placeholder for regions where no letter was recognized
+UNKNOWN_LETTER = "?"
+
+# glyph matches less similar than this are logged as unreliable
+GLYPH_MIN_CONFIDENCE = 0.7
+
+
+class OCRBackend:
+    """
+    Recognizes one letter per region, returning raw tesseract characters
+    """
+    name = ""
+
+    def recognize(self, regions: list[ImageRegion]) -> list[str]:
+        raise NotImplementedError
+
+
+class TesseractBackend(OCRBackend):
+    name = "tesseract"
+
+    def recognize(self, regions: list[ImageRegion]) -> list[str]:
+        return [self.recognize_one(region) for region in regions]
+
+    @staticmethod
+    def recognize_one(region: ImageRegion) -> str:
+        letter = pytesseract.image_to_string(
+            array2image(region.image),
+            lang=LANG,
+            config=f"--psm 10 -c tessedit_char_whitelist={CHAR_WHITELIST}",
+        ).strip()
+        return letter[0] if letter else UNKNOWN_LETTER
+
+
+def _assign_to_tiles(
+    symbols: list[tuple[str, float]], count: int, pitch: int, offset: int
+) -> list[Union[str, None]]:
+    """
+    Map recognized (character, center x) symbols on a strip to its tiles,
+    keeping the first character found in every tile
+    """
+    letters = [None] * count
+    for char, center in symbols:
+        tile = int((center - offset) // pitch)
+        if char.strip() and 0 <= tile < count and letters[tile] is None:
+            letters[tile] = char
+    return letters
+
+
+class TesseractStripBackend(OCRBackend):
+    name = "strip"
+
+    def recognize(self, regions: list[ImageRegion]) -> list[str]:
+        strip, pitch, offset = strip_region_images(regions)
+        boxes = pytesseract.image_to_boxes(
+            array2image(strip),
+            lang=LANG,
+            config=f"--psm 7 -c tessedit_char_whitelist={CHAR_WHITELIST}",
+        )
+
+        # box lines are "char left bottom right top page"
+        symbols = []
+        for line in boxes.splitlines():
+            parts = line.split(" ")
+            if len(parts) == 6:
+                symbols.append((parts[0], (int(parts[1]) + int(parts[3])) / 2))
+
+        letters = _assign_to_tiles(symbols, len(regions), pitch, offset)
+        # letters missed on the strip are retried one by one
+        return [
+            letter if letter is not None else TesseractBackend.recognize_one(region)
+            for letter, region in zip(letters, regions)
+        ]
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    Keeps one initialized tesseract engine per process, so the language
+    data is loaded once instead of on every recognition
+    """
+    name = "tesserocr"
+
+    def __init__(self):
+        self._api = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_api(self):
+        # engine is not inherited by forked worker processes, create a new one
+        if self._api is None or self._pid != os.getpid():
+            import tesserocr
+
+            kwargs = {"lang": LANG, "psm": tesserocr.PSM.SINGLE_LINE}
+            if os.getenv("TESSDATA_PREFIX"):
+                kwargs["path"] = os.getenv("TESSDATA_PREFIX")
+            self._api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._api.SetVariable("tessedit_char_whitelist", CHAR_WHITELIST)
+            self._pid = os.getpid()
+        return self._api
+
+    def recognize(self, regions: list[ImageRegion]) -> list[str]:
+        import tesserocr
+
+        strip, pitch, offset = strip_region_images(regions)
+        with self._lock:
+            api = self._get_api()
+            api.SetImage(Image.fromarray(array2image(strip)))
+            api.Recognize()
+            symbols = [
+                (symbol.GetUTF8Text(tesserocr.RIL.SYMBOL), _box_center(symbol))
+                for symbol in tesserocr.iterate_level(api.GetIterator(), tesserocr.RIL.SYMBOL)
+            ]
+
+            letters = _assign_to_tiles(symbols, len(regions), pitch, offset)
+            # letters missed on the strip are retried one by one
+            if None in letters:
+                api.SetPageSegMode(tesserocr.PSM.SINGLE_CHAR)
+                for i, region in enumerate(regions):
+                    if letters[i] is None:
+                        api.SetImage(Image.fromarray(array2image(region.image)))
+                        letter = (api.GetUTF8Text() or "").strip()
+                        letters[i] = letter[0] if letter else UNKNOWN_LETTER
+                api.SetPageSegMode(tesserocr.PSM.SINGLE_LINE)
+
+        return letters
+
+
+class GlyphBackend(OCRBackend):
+    name = "glyphs"
+
+    def __init__(self):
+        self.classifier = GlyphClassifier.load()
+
+    def classify(self, regions: list[ImageRegion]) -> list[tuple[str, float]]:
+        """
+        Letter and confidence from 0 to 1 for every region
+        """
+        return self.classifier.classify([region.image for region in regions])
+
+    def recognize(self, regions: list[ImageRegion]) -> list[str]:
+        result = self.classify(regions)
+        uncertain = [(i, letter, round(c, 2)) for i, (letter, c) in enumerate(result) if c < GLYPH_MIN_CONFIDENCE]
+        if uncertain:
+            logging.warning(f"uncertain glyph matches (region, letter, confidence): {uncertain}")
+        return [letter for letter, _ in result]
+
+
+def _box_center(symbol) -> float:
+    import tesserocr
+
+    left, _, right, _ = symbol.BoundingBox(tesserocr.RIL.SYMBOL)
+    return (left + right) / 2
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TesseractBackend, TesseractStripBackend, TesserocrBackend, GlyphBackend)
+}
+
+_backends = {}
+
+
+def get_backend(name: Union[str, None] = None) -> OCRBackend:
+    """
+    Shared backend instance by name, `OCR_BACKEND` environment variable by default
+    """
+    name = name or os.getenv("OCR_BACKEND", TesseractStripBackend.name)
+    if name not in BACKENDS:
+        raise ValueError(f"unknown OCR backend {name!r}, expected one of {list(BACKENDS)}")
+    if name not in _backends:
+        logging.info(f"using OCR backend {name}")
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
@@ -0,0 +1,92 @@
+"""
+Build reference glyphs for `ocr.glyphs.GlyphClassifier`.
+
+Letters are cropped from the example screenshots with the regular OCR pipeline,
+and every letter of the alphabet is also rendered with Pillow's default font,
+so that letters missing from the examples can still be recognized.
+
+    python -m ocr.build_glyphs
+"""
+import string
+import sys
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .glyphs import GLYPHS_PATH, GlyphClassifier, glyph_features
+from .ocr import crop_image, extract_image_regions, find_template, get_template, load_image
+
+# letters of the example boards, in the order regions are sorted (clockwise from top left)
+EXAMPLES = {
+    "examples/e01big.jpg": "CMUOSINARBHZ",
+    "examples/e01small.jpg": "CMUOSINARBHZ",
+    "examples/e02.png": "CXLOYTPNBIHE",
+}
+
+RENDER_SIZES = (32, 64)
+RENDER_STROKES = (1, 2)
+
+
+def example_glyphs(path: str) -> list[np.ndarray]:
+    with open(path, "rb") as file:
+        image, _ = load_image(file)
+    template_loc, template_dim = find_template(image, get_template())
+    cropped, _ = crop_image(image, template_loc, template_dim, 1.5)
+    _, _, regions = extract_image_regions(cropped)
+    return [region.image for region in regions]
+
+
+def rendered_glyphs(letter: str) -> list[np.ndarray]:
+    glyphs = []
+    for size in RENDER_SIZES:
+        font = ImageFont.load_default(size=size)
+        for stroke in RENDER_STROKES:
+            canvas = Image.new("L", (size * 2, size * 2), 255)
+            ImageDraw.Draw(canvas).text(
+                (size // 2, size // 4), letter, font=font, fill=0, stroke_width=stroke, stroke_fill=0
+            )
+            glyphs.append(np.asarray(canvas, dtype=np.float32) / 255)
+    return glyphs
+
+
+def main() -> None:
+    features = []
+    labels = []
+    sources = []
+
+    for path, letters in EXAMPLES.items():
+        glyphs = example_glyphs(path)
+        if len(glyphs) != len(letters):
+            sys.exit(f"{path}: found {len(glyphs)} letters, expected {len(letters)}")
+        for glyph, letter in zip(glyphs, letters):
+            features.append(glyph_features(glyph))
+            labels.append(letter)
+            sources.append(path)
+
+    for letter in string.ascii_uppercase:
+        for glyph in rendered_glyphs(letter):
+            features.append(glyph_features(glyph))
+            labels.append(letter)
+            sources.append("rendered")
+
+    features = np.stack(features).astype(np.float32)
+    labels = np.array(labels)
+    sources = np.array(sources)
+
+    # accuracy on every example board with references from other boards only,
+    # e01big and e01small are the same board and are held out together
+    for path, letters in EXAMPLES.items():
+        board = EXAMPLES[path]
+        held_out = np.isin(sources, [p for p, l in EXAMPLES.items() if l == board])
+        classifier = GlyphClassifier(features[~held_out], labels[~held_out])
+        result = classifier.classify(example_glyphs(path))
+        text = "".join(letter for letter, _ in result)
+        correct = sum(a == b for a, b in zip(text, letters))
+        print(f"{path}: {text} (expected {letters}, {correct}/{len(letters)} held out)")
+
+    np.savez_compressed(GLYPHS_PATH, features=features, labels=labels)
+    print(f"saved {len(labels)} reference glyphs to {GLYPHS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
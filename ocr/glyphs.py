@@ -0,0 +1,75 @@
+"""
+Nearest-neighbour letter classifier over normalized glyph images.
+
+Letter Boxed tiles hold a single uppercase letter in a fixed font, so comparing
+normalized crops with a small set of reference glyphs is enough to recognize
+them, in about a millisecond and without tesseract. Reference glyphs are built
+with `python -m ocr.build_glyphs`.
+"""
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+from skimage import transform
+
+GLYPHS_PATH = Path(__file__).with_name("glyphs.npz")
+
+# side of the square normalized glyph image
+GLYPH_SIZE = 16
+
+
+def glyph_features(image: np.ndarray) -> np.ndarray:
+    """
+    Normalize image of a dark letter on light background: crop to the letter,
+    pad to a square, resize to GLYPH_SIZE and scale to a zero-mean unit vector.
+    Returns zeros for images without any dark pixels.
+    """
+    ink = np.asarray(image, dtype=np.float32) < 0.5
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if not len(rows) or not len(cols):
+        return np.zeros(GLYPH_SIZE * GLYPH_SIZE, dtype=np.float32)
+
+    ink = ink[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+    height, width = ink.shape
+    side = max(height, width)
+    square = np.zeros((side, side), dtype=np.float32)
+    top = (side - height) // 2
+    left = (side - width) // 2
+    square[top : top + height, left : left + width] = ink
+
+    features = transform.resize(square, (GLYPH_SIZE, GLYPH_SIZE), anti_aliasing=True)
+    features = features.ravel().astype(np.float32)
+    features -= features.mean()
+    norm = np.linalg.norm(features)
+    return features / norm if norm else features
+
+
+class GlyphClassifier:
+    """
+    Matches glyph features against reference glyphs by cosine similarity
+    """
+    def __init__(self, features: np.ndarray, labels: np.ndarray):
+        self.features = features
+        self.labels = labels
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = GLYPHS_PATH) -> "GlyphClassifier":
+        with np.load(path) as data:
+            return cls(data["features"], data["labels"])
+
+    def classify(self, images: list[np.ndarray]) -> list[tuple[str, float]]:
+        """
+        Letter and confidence (cosine similarity to the closest reference, 0 to 1)
+        for every image
+        """
+        if not images:
+            return []
+        features = np.stack([glyph_features(image) for image in images])
+        similarity = features @ self.features.T
+        best = np.argmax(similarity, axis=1)
+        confidence = np.clip(similarity[np.arange(len(images)), best], 0, 1)
+        return [
+            (str(self.labels[i]), float(c)) if c > 0 else ("?", 0.0)
+            for i, c in zip(best, confidence)
+        ]
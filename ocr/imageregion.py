@@ -1,19 +1,45 @@
 import math
-from functools import cached_property
+from typing import NamedTuple
 
 import numpy as np
 
 from .utils import bounding_square, rescale_box
 
 
+class Frame(NamedTuple):
+    """
+    Position of a working image in the original one: pixel (row, col) of the
+    working image is at ((row + top) / scale, (col + left) / scale) in the original
+    """
+    top: int
+    left: int
+    scale: float
+
+    def shifted(self, rows: int, cols: int) -> "Frame":
+        return Frame(self.top + rows, self.left + cols, self.scale)
+
+    def to_source(self, bbox: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+        minr, minc, maxr, maxc = bbox
+        return (
+            round((minr + self.top) / self.scale),
+            round((minc + self.left) / self.scale),
+            round((maxr + self.top) / self.scale),
+            round((maxc + self.left) / self.scale),
+        )
+
+
 class ImageRegion:
+    __slots__ = ("bbox", "frame", "image")
+
     def __init__(
         self,
         bbox: tuple[int, int, int, int],
         overscale: float = 1.0,
         square_bbox: bool = False,
+        frame: Frame = Frame(0, 0, 1.0),
     ):
         self.bbox = bbox
+        self.frame = frame
         if square_bbox:
             self.square_bbox()
         self.rescale_bbox(overscale)
@@ -25,17 +51,24 @@ class ImageRegion:
     def rescale_bbox(self, factor: float) -> None:
         self.bbox = rescale_box(self.bbox, factor)
 
-    @cached_property
+    @property
+    def source_bbox(self) -> tuple[int, int, int, int]:
+        """
+        Bounding box in the original image
+        """
+        return self.frame.to_source(self.bbox)
+
+    @property
     def shape(self) -> tuple[int, int]:
         minr, minc, maxr, maxc = self.bbox
         return maxr - minr, maxc - minc
 
-    @cached_property
+    @property
     def centroid(self) -> tuple[float, float]:
         minr, minc, maxr, maxc = self.bbox
         return (minr + maxr) / 2, (minc + maxc) / 2
 
-    @cached_property
+    @property
     def area(self) -> int:
         height, width = self.shape
         return height * width
@@ -54,26 +87,56 @@ class ImageRegion:
 
 def stack_region_images(regions: list[ImageRegion]) -> np.ndarray:
     """
-    Stack images of regions horizontally
+    Stack images of regions horizontally in equal tiles, top-left aligned,
+    on a white uint8 canvas
     """
-    images = [region.image.copy() for region in regions]
-    maxdims = np.max([img.shape for img in images], axis=0)
-
-    for i, img in enumerate(images):
-        new_img = np.pad(
-            img,
-            ((0, maxdims[0] - img.shape[0]), (0, maxdims[1] - img.shape[1])),
-            mode="constant",
-            constant_values=1,
+    height = max(region.image.shape[0] for region in regions)
+    width = max(region.image.shape[1] for region in regions)
+    canvas = np.full((height, len(regions) * width), 255, dtype=np.uint8)
+
+    for i, region in enumerate(regions):
+        img_height, img_width = region.image.shape
+        left = i * width
+        # written straight into the canvas, without a scaled copy of the crop
+        np.multiply(
+            region.image, 255, out=canvas[:img_height, left : left + img_width], casting="unsafe"
         )
-        images[i] = new_img
 
-    return np.hstack(images)
+    return canvas
+
+
+def strip_region_images(
+    regions: list[ImageRegion], gap: float = 0.5
+) -> tuple[np.ndarray, int, int]:
+    """
+    Place images of regions on a single white line, centered in equal tiles
+    separated by `gap` of the tile width, so they can be recognized at once.
+
+    Returns the strip image, the tile pitch and the left offset of the first tile:
+    a letter with center at `x` belongs to region `int((x - offset) // pitch)`.
+    """
+    height = max(region.image.shape[0] for region in regions)
+    width = max(region.image.shape[1] for region in regions)
+    margin = max(int(width * gap), 1)
+    pitch = width + margin
+
+    strip = np.ones((height + 2 * margin, len(regions) * pitch + margin))
+    for i, region in enumerate(regions):
+        img_height, img_width = region.image.shape
+        top = margin + (height - img_height) // 2
+        left = margin + i * pitch + (width - img_width) // 2
+        strip[top : top + img_height, left : left + img_width] = region.image
+
+    # tile i spans [margin + i * pitch, margin + i * pitch + width), the gap before
+    # it is split evenly between neighbours
+    return strip, pitch, margin // 2
 
 
 def sort_regions_clockwise(
     regions: list[ImageRegion], start_angle_deg: int = 90
 ) -> list[ImageRegion]:
+    if not regions:
+        return []
     start_angle_rad = start_angle_deg * (math.pi / 180)  # Convert degrees to radians
 
     def find_pivot():
@@ -1,27 +1,71 @@
 import io
+import os
+from functools import cache
+from typing import Union
 
 import numpy as np
-import pytesseract
+from PIL import Image
+from scipy import ndimage
 from skimage import feature, filters, measure, morphology, segmentation, transform
 from skimage import io as skio
 
-from .imageregion import ImageRegion, stack_region_images, sort_regions_clockwise
-from .utils import array2image, imgarray2bytesio, timed
+from .backends import OCRBackend, get_backend
+from .imageregion import Frame, ImageRegion, stack_region_images, sort_regions_clockwise
+from .template import TEMPLATE_SCALES, TemplatePyramid
+from metrics import timed
 
-TEMPLATE_PATH = "templates/template3.png"
-TEMPLATE = skio.imread(TEMPLATE_PATH, as_gray=True, plugin="imageio")
+from .utils import bounding_squares, imgarray2bytesio, intersecting_boxes, rescale_boxes
 
+TEMPLATE_PATH = "templates/template3.png"
 
-async def process_image(image: io.BytesIO):
-    img = skio.imread(image, as_gray=True, plugin="imageio")
-    template = TEMPLATE
+# longest side of the working image, larger photos are downscaled on decoding
+MAX_IMAGE_SIZE = int(os.getenv("OCR_MAX_IMAGE_SIZE", 1280))
+# whether `process_image` renders a preview of what was recognized, "0" to skip it
+PREVIEW = os.getenv("OCR_PREVIEW", "1") != "0"
+# grayscale weights matching `skimage.color.rgb2gray`, used for the template
+GRAY_MATRIX = (0.2125, 0.7154, 0.0721, 0)
+
+# template matching is first done on the image downsampled to about this size
+COARSE_SIZE = 140
+# smallest template size in pixels that is still matched reliably when downsampled
+COARSE_MIN_TEMPLATE = 24
+# number of best coarse matches that are refined
+REFINE_CANDIDATES = 4
+# number of scales tried around every coarse match
+REFINE_SCALES = 3
+# search window around coarse matches, relative to template size
+REFINE_MARGIN = 0.05
+# working image shapes the template is rescaled for in advance: screenshots
+# of phones (20:9, 16:9) and tablets (4:3) downscaled to MAX_IMAGE_SIZE
+WARM_UP_SHAPES = tuple(
+    (round(MAX_IMAGE_SIZE * short / long), MAX_IMAGE_SIZE)
+    for short, long in ((9, 20), (9, 16), (3, 4))
+)
+
+
+@cache
+def get_template() -> TemplatePyramid:
+    """
+    Board template, read on first use
+    """
+    return TemplatePyramid(skio.imread(TEMPLATE_PATH, as_gray=True, plugin="imageio"))
+
+
+def process_image(
+    image: Union[io.BytesIO, bytes], preview: bool = PREVIEW
+) -> tuple[io.BytesIO, str]:
+    """
+    PNG preview of the recognized letters (empty if `preview` is off) and the letters
+    """
+    img, scale = load_image(image)
+    template = get_template()
 
     template_loc, template_dim = find_template(img, template)
-    img_cropped = crop_image(img, template_loc, template_dim, 1.5)
-    img_cleaned, _, letter_regions = extract_image_regions(img_cropped)
+    img_cropped, frame = crop_image(img, template_loc, template_dim, 1.5, Frame(0, 0, scale))
+    img_cleaned, _, letter_regions = extract_image_regions(img_cropped, frame)
 
     if not letter_regions:
-        return imgarray2bytesio(img_cleaned), ""
+        return imgarray2bytesio(img_cleaned) if preview else io.BytesIO(), ""
 
     text_ocr = ocr_letters(letter_regions)
     text_ocr = (
@@ -30,75 +74,255 @@ async def process_image(image: io.BytesIO):
         else text_ocr
     )
 
+    if not preview:
+        return io.BytesIO(), text_ocr
     outimage = stack_region_images(letter_regions)
     return imgarray2bytesio(outimage), text_ocr
 
-@timed
+@timed("decode")
+def load_image(
+    image: Union[io.BytesIO, bytes], max_size: int = MAX_IMAGE_SIZE
+) -> tuple[np.ndarray, float]:
+    """
+    Decode image into a grayscale uint8 array with the longest side of at most
+    `max_size` pixels. JPEG images are decoded directly at a reduced size,
+    so full resolution pixels are never held in memory.
+
+    Returns the array and its scale relative to the original image.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+
+    with Image.open(image) as img:
+        width = img.width
+        img.thumbnail((max_size, max_size), Image.Resampling.BOX)
+        if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+            # transparent pixels are treated as white, same as skimage does
+            img = img.convert("RGBA")
+            background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+            img = Image.alpha_composite(background, img)
+        img = img.convert("RGB").convert("L", GRAY_MATRIX) if img.mode != "L" else img
+        return np.asarray(img), img.width / width
+
+
+@timed("crop")
 def crop_image(
-    image: np.ndarray, loc: np.ndarray, dim: np.ndarray, dim_resize: float = 1.0
-) -> np.ndarray:
+    image: np.ndarray,
+    loc: np.ndarray,
+    dim: np.ndarray,
+    dim_resize: float = 1.0,
+    frame: Frame = Frame(0, 0, 1.0),
+) -> tuple[np.ndarray, Frame]:
+    """
+    Crop the area around template found at `loc` with size `dim`, enlarged by
+    `dim_resize`. Returns the view of the image and the frame of the crop
+    in the original image, given `frame` of the image itself.
+    """
     dim_resize = dim_resize - 1
     crop = [dim[0] * dim_resize, dim[1] * dim_resize]
     x, y = loc
 
-    x_min = int(x - crop[1] // 2)
+    x_min = max(int(x - crop[1] // 2), 0)
     x_max = int(x + dim[1] + crop[1] // 2)
-    y_min = int(y - crop[0] // 2)
+    y_min = max(int(y - crop[0] // 2), 0)
     y_max = int(y + dim[0] + crop[0] // 2)
 
-    return image[y_min:y_max, x_min:x_max]
-
-@timed
-def find_template(image: np.ndarray, template: np.ndarray) -> np.ndarray:
+    return image[y_min:y_max, x_min:x_max], frame.shifted(y_min, x_min)
+
+def _match_in_window(
+    image: np.ndarray, template: np.ndarray, location: tuple[int, int], margin: int
+) -> tuple[float, tuple[int, int]]:
+    """
+    Best correlation and location (row, col) of template placed
+    at most `margin` pixels away from `location` in the image
+    """
+    row, col = location
+    height, width = template.shape
+    top = max(row - margin, 0)
+    left = max(col - margin, 0)
+    window = image[top : row + height + margin, left : col + width + margin]
+    if height > window.shape[0] or width > window.shape[1]:
+        return -1, location
+
+    result = feature.match_template(window, template)
+    ij = np.unravel_index(np.argmax(result), result.shape)
+    return result[ij], (top + ij[0], left + ij[1])
+
+
+def _match_at_offsets(
+    image: np.ndarray, template: np.ndarray, location: tuple[int, int], margin: int
+) -> tuple[float, tuple[int, int]]:
+    """
+    Same as `_match_in_window`, but computes normalized correlation directly
+    for every offset, which is cheaper than FFT for very small margins
+    """
+    height, width = template.shape
+    template = template - template.mean()
+    template_norm = np.sqrt(np.sum(template**2))
+
+    best = (-1, location)
+    for row in range(max(location[0] - margin, 0), location[0] + margin + 1):
+        for col in range(max(location[1] - margin, 0), location[1] + margin + 1):
+            patch = image[row : row + height, col : col + width]
+            if patch.shape != template.shape:
+                continue
+            patch = patch.astype(np.float64)
+            patch_norm = np.sqrt(np.sum(patch**2) - np.sum(patch) ** 2 / patch.size)
+            if not patch_norm or not template_norm:
+                continue
+            corr = np.vdot(patch, template) / (patch_norm * template_norm)
+            if corr > best[0]:
+                best = (corr, (row, col))
+    return best
+
+
+def _pyramid_depth(shape: tuple[int, int]) -> int:
+    """
+    Number of levels of the pyramid `find_template` builds for an image of `shape`
+    """
+    depth, size = 1, min(shape)
+    while size / 2 >= COARSE_SIZE:
+        size = -(-size // 2)
+        depth += 1
+    return depth
+
+
+def _search_scales(image_shape: tuple[int, int], template_shape: tuple[int, int]) -> np.ndarray:
+    """
+    Template scales tried on an image of `image_shape`
+    """
     min_scale = 0.2
     max_scale = 2
-    num_levels = 10
 
     # find safe range of scales:
     # 1. template should not be larger than image
     # 2. template should not be smaller than 10% of the image,
     #    as we probably would not be able to detect letters at this scale anyway
     image_template_ratio = min(
-        image.shape[0] / template.shape[0], image.shape[1] / template.shape[1]
+        image_shape[0] / template_shape[0], image_shape[1] / template_shape[1]
     )
     min_scale = max(min_scale, 0.1 * image_template_ratio)
     max_scale = min(max_scale, image_template_ratio)
-    scales = np.logspace(np.log10(min_scale), np.log10(max_scale), num=num_levels)
+    scales = TEMPLATE_SCALES[(TEMPLATE_SCALES >= min_scale) & (TEMPLATE_SCALES <= max_scale)]
+    if not len(scales):
+        scales = np.array([max_scale])
+    return scales
+
+
+def _coarse_level(template_shape: tuple[int, int], scale: float, top: int) -> int:
+    # coarsest level up to `top` where the template is at least COARSE_MIN_TEMPLATE pixels
+    level = top
+    while level and min(template_shape) * scale / 2**level < COARSE_MIN_TEMPLATE:
+        level -= 1
+    return level
+
+
+def _refine_scales(coarse_scale: float) -> np.ndarray:
+    # scales between the neighbouring coarse scales
+    step = TEMPLATE_SCALES[1] / TEMPLATE_SCALES[0]
+    return coarse_scale * step ** np.linspace(-0.5, 0.5, REFINE_SCALES)
+
+
+def template_scales(image_shape: tuple[int, int], template_shape: tuple[int, int]) -> set[float]:
+    """
+    Scales `find_template` may rescale the template to when matching candidates
+    on an image of `image_shape`. Scales used only to refine the position of the
+    best match are left out: they are full size, and every image needs just one.
+    """
+    top = _pyramid_depth(image_shape) - 1
+    scales = set()
+    for scale in _search_scales(image_shape, template_shape):
+        level = _coarse_level(template_shape, scale, top)
+        scales.add(scale / 2**level)
+        if level:
+            scales.update(_refine_scales(scale) / 2 ** (level - 1))
+    return scales
+
+
+def precompute_template(shapes: tuple[tuple[int, int], ...] = WARM_UP_SHAPES) -> None:
+    """
+    Rescale the template in advance for images of `shapes`,
+    so the first images do not pay for it
+    """
+    template = get_template()
+    template.precompute(
+        sorted(set().union(*(template_scales(shape, template.shape) for shape in shapes)))
+    )
 
-    max_corr = 0
-    best_location = (0, 0)
-    best_template_dim = (template.shape[1], template.shape[0])
 
-    # Perform template matching at different scales
-    for scale in scales:
-        template_rescaled = transform.rescale(template, scale)
+@timed("template_match")
+def find_template(image: np.ndarray, template: TemplatePyramid) -> tuple:
+    """
+    Find location (x, y) and size (width, height) of the template in the image.
 
+    Candidate scales and locations are found on heavily downsampled copies of
+    the image, refined on a pyramid of less downsampled ones, and only the
+    final position is matched at full resolution in a small window.
+    """
+    scales = _search_scales(image.shape, template.shape)
+
+    # pyramid[k] is the image downsampled by 2**k, down to about COARSE_SIZE pixels
+    pyramid = [image]
+    for _ in range(_pyramid_depth(image.shape) - 1):
+        pyramid.append(transform.downscale_local_mean(pyramid[-1], (2, 2)))
+
+    # coarse: best match for every scale, on the coarsest level where the template
+    # is still at least COARSE_MIN_TEMPLATE pixels. Small templates can score high
+    # on unrelated features when downsampled, so several candidates are kept
+    candidates = []
+    for scale in scales:
+        level = _coarse_level(template.shape, scale, len(pyramid) - 1)
+        template_rescaled = template.rescaled(scale / 2**level)
         if (
-            template_rescaled.shape[0] > image.shape[0]
-            or template_rescaled.shape[1] > image.shape[1]
+            template_rescaled.shape[0] > pyramid[level].shape[0]
+            or template_rescaled.shape[1] > pyramid[level].shape[1]
         ):
             continue
 
-        result = feature.match_template(
-            image,
-            template_rescaled,
-        )
+        result = feature.match_template(pyramid[level], template_rescaled)
+        ij = np.unravel_index(np.argmax(result), result.shape)
+        candidates.append((result[ij], scale, level, (int(ij[0]), int(ij[1]))))
 
-        # Check for the highest correlation at this scale
-        correlation = np.max(result)
-        if correlation > max_corr:
-            max_corr = correlation
-            best_result = result
-            best_template_dim = (template_rescaled.shape[1], template_rescaled.shape[0])
+    if not candidates:
+        raise ValueError("template does not fit into the image")
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
 
-    ij = np.unravel_index(np.argmax(best_result), best_result.shape)
-    best_location = ij[::-1]
+    # fine: one level down, try scales between neighbouring coarse scales
+    # around every candidate and keep the best one
+    refined = []
+    for corr, coarse_scale, level, (row, col) in candidates[:REFINE_CANDIDATES]:
+        if not level:
+            refined.append((corr, coarse_scale, level, (row, col)))
+            continue
 
-    return best_location, best_template_dim
+        level -= 1
+        for scale in _refine_scales(coarse_scale):
+            template_rescaled = template.rescaled(scale / 2**level)
+            margin = 2 + int(max(template_rescaled.shape) * REFINE_MARGIN)
+            corr, location = _match_in_window(
+                pyramid[level], template_rescaled, (row * 2, col * 2), margin
+            )
+            refined.append((corr, scale, level, location))
+
+    _, best_scale, level, location = max(refined, key=lambda candidate: candidate[0])
+
+    # finest levels: same scale, only the position is refined
+    while level > 0:
+        level -= 1
+        _, location = _match_at_offsets(
+            pyramid[level],
+            template.rescaled(best_scale / 2**level),
+            (location[0] * 2, location[1] * 2),
+            margin=2,
+        )
 
-@timed
+    height, width = template.scaled_shape(best_scale)
+    return location[::-1], (width, height)
+
+
+@timed("segmentation")
 def extract_image_regions(
-    image: np.ndarray,
+    image: np.ndarray, frame: Frame = Frame(0, 0, 1.0)
 ) -> tuple[np.ndarray, list[ImageRegion], list[ImageRegion]]:
     thresh = filters.threshold_otsu(image)
     bw = morphology.closing(image > thresh, morphology.square(3))
@@ -106,46 +330,47 @@ def extract_image_regions(
 
     label_image = measure.label(cleaned)
 
-    regions = [ImageRegion(region.bbox, square_bbox=True) for region in measure.regionprops(label_image)]
+    # bounding boxes (minr, minc, maxr, maxc) of all components, squared
+    slices = ndimage.find_objects(label_image)
+    boxes = np.array(
+        [(rows.start, cols.start, rows.stop, cols.stop) for rows, cols in slices], dtype=np.int64
+    ).reshape(-1, 4)
+    boxes = bounding_squares(boxes)
+    cleaned = np.invert(cleaned)
+    if not len(boxes):
+        return cleaned, [], []
 
-    max_area = max(r.area for r in regions)
-    min_area = min(r.area for r in regions)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    max_area = areas.max()
+    min_area = areas.min()
 
     # big regions are regions that are 85% of the biggest region
     # we assume that big regions are the regions that contain central field
-    big_regions = [r for r in regions if r.area >= max_area * 0.85]
-    
+    big = areas >= max_area * 0.85
+
     # filter out regions that are too small or too big
     # and intersect with big regions
+    letters = (areas >= min_area * 1.05) & ~big
+    letters[letters] = ~intersecting_boxes(boxes[letters], boxes[big])
+
+    big_regions = [ImageRegion(tuple(box.tolist()), frame=frame) for box in boxes[big]]
     letter_regions = [
-        r
-        for r in regions
-        if min_area * 1.05 <= r.area < max_area * 0.85
-        and not any(r.intersects(big_r) for big_r in big_regions)
+        ImageRegion(tuple(box.tolist()), frame=frame) for box in rescale_boxes(boxes[letters], 1.15)
     ]
-    
+
     # sort letter regions clockwise starting from the top left corner
     # this will ensure correct order for solving the puzzle (given that we recognize letters correctly)
     letter_regions = sort_regions_clockwise(letter_regions, 45)
-    
-    cleaned = np.invert(cleaned)
+
     for region in letter_regions:
-        region.rescale_bbox(1.15)
         region.crop_from_image(cleaned)
 
     return cleaned, big_regions, letter_regions
 
-@timed
-def ocr_letters(regions: list[ImageRegion]) -> str:
-    ocr_letters = []
-
-    for region in regions:
-        letter = pytesseract.image_to_string(
-            array2image(region.image),
-            lang="eng",
-            config="--psm 10 -c tessedit_char_whitelist=|lckmopsuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ01",
-        )
-        ocr_letters.append(letter)
+@timed("ocr")
+def ocr_letters(regions: list[ImageRegion], backend: Union[OCRBackend, None] = None) -> str:
+    backend = backend or get_backend()
+    ocr_letters = backend.recognize(regions)
 
     text_replacers = {
         # look-alike characters
@@ -0,0 +1,36 @@
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+from skimage import transform
+
+# scales at which the template is matched, shared between images
+# so that rescaled templates can be cached, ~10% apart
+TEMPLATE_SCALES = np.geomspace(0.05, 2, num=41)
+
+
+class TemplatePyramid:
+    """
+    Template with a cache of its rescaled versions
+    """
+    def __init__(self, template: np.ndarray, cache_size: int = 256):
+        self.template = template
+        self.shape = template.shape
+        self._rescaled = lru_cache(maxsize=cache_size)(self._rescale)
+
+    def _rescale(self, scale: float) -> np.ndarray:
+        return transform.rescale(self.template, scale)
+
+    def rescaled(self, scale: float) -> np.ndarray:
+        # round, so that float noise in computed scales still hits the cache
+        return self._rescaled(round(float(scale), 4))
+
+    def precompute(self, scales: Iterable[float]) -> None:
+        """
+        Rescale the template to `scales` in advance, see `ocr.ocr.template_scales`
+        """
+        for scale in scales:
+            self.rescaled(scale)
+
+    def scaled_shape(self, scale: float) -> tuple[int, int]:
+        return self.rescaled(scale).shape
@@ -1,10 +1,10 @@
 import io
-import logging
-from datetime import datetime
-from functools import wraps
 
 import numpy as np
-from skimage import io as skio
+from PIL import Image
+
+# previews are small and sent right away, fast compression is enough
+PNG_COMPRESS_LEVEL = 1
 
 
 def rescale_box(
@@ -54,20 +54,61 @@ def bounding_square(box: tuple[int, int, int, int]) -> tuple[int, int, int, int]
     return minr, minc, maxr, maxc
 
 
+def bounding_squares(boxes: np.ndarray) -> np.ndarray:
+    """
+    `bounding_square` of every row of an (N, 4) array of bounding boxes
+    """
+    boxes = boxes.copy()
+    height = boxes[:, 2] - boxes[:, 0]
+    width = boxes[:, 3] - boxes[:, 1]
+    half_diff = np.abs(width - height) // 2
+    # grow the shorter side on both ends
+    rows = np.where(width > height, half_diff, 0)
+    cols = np.where(width > height, 0, half_diff)
+    boxes[:, 0] -= rows
+    boxes[:, 2] += rows
+    boxes[:, 1] -= cols
+    boxes[:, 3] += cols
+    return boxes
+
+
+def rescale_boxes(boxes: np.ndarray, factor: float = 1.0) -> np.ndarray:
+    """
+    `rescale_box` of every row of an (N, 4) array of bounding boxes
+    """
+    center = (boxes[:, :2] + boxes[:, 2:]) / 2
+    half_size = (boxes[:, 2:] - boxes[:, :2]) * factor / 2
+    # truncated towards zero like `int`
+    return np.trunc(np.hstack((center - half_size, center + half_size))).astype(boxes.dtype)
+
+
+def intersecting_boxes(boxes: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Mask of boxes that intersect (or touch) any of the other boxes
+    """
+    if not len(others):
+        return np.zeros(len(boxes), dtype=bool)
+    a = boxes[:, None, :]
+    b = others[None, :, :]
+    apart = (
+        (a[..., 0] > b[..., 2])
+        | (a[..., 2] < b[..., 0])
+        | (a[..., 1] > b[..., 3])
+        | (a[..., 3] < b[..., 1])
+    )
+    return ~apart.all(axis=1)
+
+
 def array2image(image: np.ndarray) -> np.ndarray:
     return (image * 255).astype(np.uint8)
 
-def imgarray2bytesio(image: np.ndarray) -> io.BytesIO:
-    image = array2image(image)
-    image_bytes = skio.imsave("<bytes>", image, plugin="imageio", extension=".png")
-    return io.BytesIO(image_bytes)
-
-def timed(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start = datetime.now()
-        result = func(*args, **kwargs)
-        end = datetime.now()
-        logging.info(f"{func.__name__} ran in: {end - start}")
-        return result
-    return wrapper
\ No newline at end of file
+def imgarray2bytesio(image: np.ndarray, compress_level: int = PNG_COMPRESS_LEVEL) -> io.BytesIO:
+    """
+    PNG of a uint8 image, or of a float or bool one with values in [0, 1]
+    """
+    if image.dtype != np.uint8:
+        image = array2image(image)
+    output = io.BytesIO()
+    Image.fromarray(image).save(output, format="PNG", compress_level=compress_level)
+    output.seek(0)
+    return output
@@ -1,3 +1,15 @@
-from .solver import solve
+from .cache import solution_cache
+from .dictionary import DICTIONARIES, Dictionary, get_dictionary, load_dictionaries, load_dictionary
+from .solver import solution_key, solve, store_solution
 
-__all__ = ["solve"]
\ No newline at end of file
+__all__ = [
+    "DICTIONARIES",
+    "Dictionary",
+    "get_dictionary",
+    "load_dictionaries",
+    "load_dictionary",
+    "solution_cache",
+    "solution_key",
+    "solve",
+    "store_solution",
+]
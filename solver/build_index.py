@@ -0,0 +1,13 @@
+import sys
+from pathlib import Path
+
+from .index import compile_index
+
+if __name__ == "__main__":
+    if not 2 <= len(sys.argv) <= 3:
+        sys.exit("usage: python -m solver.build_index WORDS_TXT [INDEX]")
+
+    source = Path(sys.argv[1])
+    target = Path(sys.argv[2]) if len(sys.argv) == 3 else source.with_suffix(".idx")
+    compile_index(source, target)
+    print(f"compiled {source} -> {target} ({target.stat().st_size} bytes)")
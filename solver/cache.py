@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Union
+
+from metrics import registry
+
+CACHE_LOOKUPS = registry.counter(
+    "letterboxed_solution_cache_lookups_total", "Solution cache lookups by result", ("result",)
+)
+
+
+def canonical_board(puzzle: str) -> str:
+    """
+    Normalize puzzle in abc-def-ghi-jkl format, so that the order of sides
+    and of letters within a side (i.e. rotations and reflections) do not matter
+    """
+    return "-".join(sorted("".join(sorted(side)) for side in puzzle.split("-")))
+
+
+class SolutionCache:
+    """
+    Bounded LRU cache of solver results with an optional SQLite tier.
+
+    The in-memory tier holds up to `maxsize` results. When `path` is given,
+    results are also written to an SQLite database holding up to `disk_maxsize`
+    of the most recently used results, which survives restarts and can be shared
+    by several processes. The database is opened on first use in every process,
+    as SQLite connections must not be used across fork().
+    """
+    def __init__(
+        self,
+        maxsize: int = 256,
+        path: Union[str, Path, None] = None,
+        disk_maxsize: int = 10_000,
+    ):
+        self.maxsize = maxsize
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._pid = None
+        # connections opened before a fork, kept so they are never closed in a child
+        self._inherited = []
+
+    def get(self, key: str) -> Union[Any, None]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(result="hit")
+                return self._entries[key]
+
+            value = self._disk_get(key)
+            if value is not None:
+                self.disk_hits += 1
+                CACHE_LOOKUPS.inc(result="disk_hit")
+                self._remember(key, value)
+                return value
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._remember(key, value)
+            self._disk_put(key, value)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        # a connection is not inherited by forked worker processes, open a new one
+        if self._db is None or self._pid != os.getpid():
+            if self._db is not None:
+                self._inherited.append(self._db)
+            self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._pid = os.getpid()
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS solutions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key: str) -> Union[Any, None]:
+        if self.path is None:
+            return None
+        try:
+            db = self._connection()
+            row = db.execute(
+                "SELECT value FROM solutions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE solutions SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            db.commit()
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            logging.warning(f"solution cache read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, value: Any) -> None:
+        if self.path is None:
+            return
+        try:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO solutions (key, value, accessed) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            db.execute(
+                "DELETE FROM solutions WHERE key NOT IN "
+                "(SELECT key FROM solutions ORDER BY accessed DESC LIMIT ?)",
+                (self.disk_maxsize,),
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"solution cache write failed: {e}")
+
+
+solution_cache = SolutionCache(
+    maxsize=int(os.getenv("SOLVER_CACHE_SIZE", "256")),
+    path=os.getenv("SOLVER_CACHE_DB") or None,
+)
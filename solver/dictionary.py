@@ -0,0 +1,114 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+from metrics import registry, timed
+
+from .index import load_index, source_checksum
+
+DEFAULT_DICTIONARY_PATH = Path(__file__).with_name("words.txt")
+
+DICTIONARY_BYTES = registry.gauge(
+    "letterboxed_dictionary_bytes",
+    "Size of dictionary indexes, mapped ones are shared by all processes",
+    ("dictionary", "storage"),
+)
+DICTIONARY_WORDS = registry.gauge("letterboxed_dictionary_words", "Words in dictionaries", ("dictionary",))
+
+
+class Dictionary:
+    """
+    Word trie and word table for a newline-delimited .txt word list.
+
+    Both are backed by a read-only memory-mapped index compiled next to the
+    word list (see `solver.index`), so instances are immutable and a single
+    dictionary can be shared by every puzzle solved in the process.
+    """
+    __slots__ = ("path", "version", "trie", "words", "word_count", "nbytes", "mapped")
+
+    def __init__(self, path: Union[str, Path], index_path: Union[str, Path, None] = None):
+        self.path = str(path)
+        self.version = source_checksum(path).hex()[:16]
+        self.trie, self.words = load_index(path, index_path)
+        self.word_count = len(self.words)
+
+        buffers = (
+            self.trie.child_mask,
+            self.trie.first_child,
+            self.trie.terminal,
+            self.words.masks,
+            self.words.letters,
+            self.words.offsets,
+            self.words.blob,
+        )
+        self.nbytes = sum(memoryview(buffer).nbytes for buffer in buffers)
+        # built in memory when the index file could not be written
+        self.mapped = isinstance(self.trie.child_mask, memoryview)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r}, words={self.word_count})"
+
+
+def load_dictionary(path: Union[str, Path] = DEFAULT_DICTIONARY_PATH) -> Dictionary:
+    """
+    Load dictionary from path, building it only once per process
+    """
+    return _load_dictionary(str(Path(path).resolve()))
+
+
+@lru_cache(maxsize=None)
+@timed("trie_build")
+def _load_dictionary(path: str) -> Dictionary:
+    # identical word lists at different paths share one index
+    version = source_checksum(path).hex()[:16]
+    if version not in _dictionaries:
+        _dictionaries[version] = Dictionary(path)
+    return _dictionaries[version]
+
+
+_dictionaries = {}
+
+
+def dictionary_paths(spec: Union[str, None] = None) -> dict[str, Path]:
+    """
+    Word lists by name: "default" is the bundled one, others are given as
+    comma-separated name=path pairs in `SOLVER_DICTIONARIES`
+    """
+    spec = spec if spec is not None else os.getenv("SOLVER_DICTIONARIES", "")
+    paths = {"default": DEFAULT_DICTIONARY_PATH}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, separator, path = entry.partition("=")
+        if not separator or not name.strip() or not path.strip():
+            raise ValueError(f"expected name=path in SOLVER_DICTIONARIES, got {entry!r}")
+        paths[name.strip()] = Path(path.strip())
+    return paths
+
+
+DICTIONARIES = dictionary_paths()
+# dictionary used when a request does not pick one
+DEFAULT_DICTIONARY = os.getenv("SOLVER_DICTIONARY", "default")
+
+
+def get_dictionary(name: Union[str, None] = None) -> Dictionary:
+    """
+    Shared dictionary by name, `SOLVER_DICTIONARY` environment variable by default
+    """
+    name = name or DEFAULT_DICTIONARY
+    if name not in DICTIONARIES:
+        raise ValueError(f"unknown dictionary {name!r}, expected one of {list(DICTIONARIES)}")
+    dictionary = load_dictionary(DICTIONARIES[name])
+    DICTIONARY_WORDS.set(dictionary.word_count, dictionary=name)
+    DICTIONARY_BYTES.set(
+        dictionary.nbytes, dictionary=name, storage="mapped" if dictionary.mapped else "heap"
+    )
+    return dictionary
+
+
+def load_dictionaries() -> dict[str, Dictionary]:
+    """
+    Load every registered dictionary, so requests never have to
+    """
+    return {name: get_dictionary(name) for name in DICTIONARIES}
@@ -0,0 +1,97 @@
+from typing import TYPE_CHECKING, Iterator, List
+
+from metrics import timed
+
+from .utils import PUZZLE_SIZE
+
+if TYPE_CHECKING:
+    from .solver import LetterBoxed
+
+
+class SolutionCounter:
+    """
+    Solutions counted and spelled out from the dynamic programming layers of
+    a puzzle.
+
+    `LetterBoxed.deepen` builds layer `k` of (covered letters mask, last letter)
+    states reachable with exactly `k` word groups, together with the number
+    of group chains (meta-solutions) and word chains leading to every state,
+    so solutions are counted per length without enumerating paths. This engine
+    reads those layers and only differs in how solutions are enumerated:
+    depth-first over `edges`, descending into states that lead to a solution.
+    """
+    def __init__(self, puzzle: "LetterBoxed"):
+        self.puzzle = puzzle
+        self.input_string = puzzle.input_string
+
+    @staticmethod
+    def _is_complete(mask: int) -> bool:
+        return mask.bit_count() == PUZZLE_SIZE
+
+    def _ensure(self, len_threshold: int) -> None:
+        while self.puzzle.depth < len_threshold:
+            self.puzzle.deepen()
+
+    def count(self, len_threshold: int) -> tuple[int, int]:
+        """
+        Number of meta-solutions and full (word) solutions of at most `len_threshold` words
+        """
+        self._ensure(len_threshold)
+        return self.puzzle.count_solutions(len_threshold)
+
+    @timed("count")
+    def min_len_threshold(self, accepted_len: tuple[int, int]) -> int:
+        """
+        Smallest threshold in `accepted_len` range that has any solutions,
+        or the upper bound of the range if there are none
+        """
+        for len_threshold in range(accepted_len[0], accepted_len[1] + 1):
+            if self.count(len_threshold)[0]:
+                return len_threshold
+        return accepted_len[1]
+
+    def _live_states(self, len_threshold: int) -> List[set]:
+        """
+        live[k] = states at layer `k` that can still be completed within `len_threshold` words,
+        found by following back-pointers of the layers from the completed chains
+        """
+        self._ensure(len_threshold)
+        layers = self.puzzle.layers
+        completions = self.puzzle.completions
+        live = [set() for _ in range(len_threshold + 1)]
+
+        for k in range(len_threshold - 1, 0, -1):
+            live[k].update(state for state, _ in completions[k + 1])
+            for state in live[k]:
+                live[k - 1].update(parent for parent, _ in layers[k][state])
+        return live
+
+    def iter_solutions(self, len_threshold: int) -> Iterator[List[List[str]]]:
+        """
+        Lazily yield the same solutions as `LetterBoxed.find_all_solutions`,
+        only descending into states known to lead to a solution
+        """
+        edges = self.puzzle.edges
+        live = self._live_states(len_threshold)
+        path = []
+
+        def descend(covered: int, last_letter: str, depth: int) -> Iterator[List[List[str]]]:
+            for edge_mask, edge_last, edge_words in edges[last_letter]:
+                if not edge_mask & ~covered:
+                    continue
+                letters = covered | edge_mask
+                if self._is_complete(letters):
+                    yield path + [edge_words]
+                elif depth + 1 < len_threshold and (letters, edge_last) in live[depth + 1]:
+                    path.append(edge_words)
+                    yield from descend(letters, edge_last, depth + 1)
+                    path.pop()
+
+        for first_letter in edges:
+            for edge_mask, edge_last, edge_words in edges[first_letter]:
+                if self._is_complete(edge_mask):
+                    yield [edge_words]
+                elif len_threshold > 1 and (edge_mask, edge_last) in live[1]:
+                    path.append(edge_words)
+                    yield from descend(edge_mask, edge_last, 1)
+                    path.pop()
@@ -0,0 +1,310 @@
+"""
+Precompiled binary dictionary index.
+
+The index holds the packed trie together with a per-word table of letter
+bitmasks and letters of every word as a fixed-width row. It is opened with
+`mmap`, so every process using the same index file shares its physical pages
+and startup only has to read the header.
+
+Compile an index offline with:
+
+    python -m solver.build_index solver/words.txt [solver/words.idx]
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Sequence, Union
+
+import numpy as np
+
+from .trie import PackedTrie
+
+MAGIC = b"LBXIDX"
+VERSION = 4
+BYTEORDER = b"L" if sys.byteorder == "little" else b"B"
+
+# magic, version, byteorder, source sha256, alphabet bytes, nodes, words, blob bytes,
+# letters per word row
+HEADER = struct.Struct("<6sHc32sIIIII")
+
+# fills word rows after the last letter
+NO_LETTER = 0xFF
+
+# letters of the alphabet are bits of 64-bit trie and word masks
+MAX_ALPHABET = 64
+
+
+class WordTable:
+    """
+    Dictionary words in sorted order with their letter bitmasks and alphabet
+    indices of their letters as rows of a (words, longest word) matrix padded
+    with NO_LETTER
+    """
+    __slots__ = ("alphabet", "masks", "letters", "offsets", "blob")
+
+    def __init__(
+        self,
+        alphabet: str,
+        masks: Sequence[int],
+        letters: np.ndarray,
+        offsets: Sequence[int],
+        blob: Union[bytes, memoryview],
+    ):
+        self.alphabet = alphabet
+        self.masks = np.frombuffer(masks, dtype=np.uint64)
+        self.letters = letters
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_words(cls, words: Sequence[str], trie: PackedTrie) -> "WordTable":
+        masks = array("Q")
+        offsets = array("I", [0])
+        blob = bytearray()
+        letters = np.full(
+            (len(words), max(map(len, words), default=0)), NO_LETTER, dtype=np.uint8
+        )
+
+        for i, word in enumerate(words):
+            masks.append(trie.letters_mask(word))
+            letters[i, : len(word)] = [trie.letter_index[letter] for letter in word]
+            blob += word.encode()
+            offsets.append(len(blob))
+
+        return cls(trie.alphabet, masks, letters, offsets, bytes(blob))
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i] : self.offsets[i + 1]]).decode()
+
+    def board_words(self, sides: Sequence[int]) -> list[str]:
+        """
+        Words made only of letters of the board `sides` (given as letter bitmasks),
+        in which no two consecutive letters are from the same side.
+
+        Words are returned in the order `PackedTrie.walk` yields them: a word comes
+        before the words it is a prefix of, other words follow in reverse
+        alphabetical order.
+        """
+        board_mask = 0
+        side_of = np.full(256, NO_LETTER, dtype=np.uint8)
+        for side, side_mask in enumerate(sides):
+            board_mask |= side_mask
+            while side_mask:
+                bit = side_mask & -side_mask
+                side_mask ^= bit
+                side_of[bit.bit_length() - 1] = side
+
+        outside = np.uint64(~board_mask & 0xFFFFFFFFFFFFFFFF)
+        candidates = np.flatnonzero((self.masks & outside) == 0)
+
+        letters = self.letters[candidates]
+        letter_sides = side_of[letters]
+        same_side = (letter_sides[:, 1:] == letter_sides[:, :-1]) & (
+            letters[:, 1:] != NO_LETTER
+        )
+        candidates = candidates[~same_side.any(axis=1)]
+
+        # inverted letters sort in reverse alphabetical order, with padding (and so
+        # shorter prefixes) first; every 8 letters are packed into one big-endian key
+        width = self.letters.shape[1]
+        keys = np.zeros((len(candidates), -(-width // 8) * 8), dtype=np.uint8)
+        keys[:, :width] = NO_LETTER - self.letters[candidates]
+        keys = keys.view(">u8")
+        candidates = candidates[np.lexsort(keys.T[::-1])]
+        if not self.alphabet.isascii():
+            return [self[i] for i in candidates]
+
+        # spell all words at once: one line per word, padding becomes NUL bytes
+        chars = np.zeros(256, dtype=np.uint8)
+        chars[: len(self.alphabet)] = np.frombuffer(self.alphabet.encode(), dtype=np.uint8)
+        lines = np.full((len(candidates), width + 1), ord("\n"), dtype=np.uint8)
+        lines[:, :width] = chars[self.letters[candidates]]
+        return lines.tobytes().replace(b"\0", b"").decode().split("\n")[:-1]
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _layout(
+    alphabet_size: int, node_count: int, word_count: int, blob_size: int, width: int
+) -> list[tuple[int, int]]:
+    """
+    (offset, size) in bytes of every section following the header
+    """
+    sizes = [
+        alphabet_size,  # alphabet, utf-8
+        node_count * 8,  # trie child_mask, uint64
+        node_count * 4,  # trie first_child, uint32
+        (node_count + 7) // 8,  # trie terminal bitset
+        word_count * 8,  # word masks, uint64
+        word_count * width,  # word letters, uint8 rows
+        (word_count + 1) * 4,  # word offsets into blob, uint32
+        blob_size,  # words, utf-8
+    ]
+    sections = []
+    offset = _align(HEADER.size)
+    for size in sizes:
+        sections.append((offset, size))
+        offset = _align(offset + size)
+    return sections
+
+
+def source_checksum(source: Union[str, Path]) -> bytes:
+    with open(source, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def read_words(source: Union[str, Path]) -> list[str]:
+    """
+    Lowercase words of word list `source`, skipping those with anything but
+    letters (hyphens, apostrophes, digits), which no board can spell
+    """
+    with open(source, encoding="utf-8") as f:
+        words = sorted({word for word in (line.strip().lower() for line in f) if word.isalpha()})
+    alphabet = {letter for word in words for letter in word}
+    if len(alphabet) > MAX_ALPHABET:
+        raise ValueError(
+            f"word list {source} has {len(alphabet)} distinct letters, at most {MAX_ALPHABET} are supported"
+        )
+    return words
+
+
+def compile_index(source: Union[str, Path], target: Union[str, Path]) -> None:
+    """
+    Compile newline-delimited word list `source` into binary index `target`
+    """
+    words = read_words(source)
+    trie = PackedTrie.from_words(words)
+    table = WordTable.from_words(words, trie)
+    alphabet = trie.alphabet.encode()
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        BYTEORDER,
+        source_checksum(source),
+        len(alphabet),
+        len(trie),
+        len(table),
+        len(table.blob),
+        table.letters.shape[1],
+    )
+    payloads = [
+        alphabet,
+        trie.child_mask.tobytes(),
+        trie.first_child.tobytes(),
+        bytes(trie.terminal),
+        table.masks.tobytes(),
+        table.letters.tobytes(),
+        table.offsets.tobytes(),
+        table.blob,
+    ]
+
+    # write to a temporary file and swap it in, so readers never see a partial index
+    target = Path(target)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        for (offset, _), payload in zip(
+            _layout(len(alphabet), len(trie), len(table), len(table.blob), table.letters.shape[1]),
+            payloads,
+        ):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(payload)
+    os.replace(tmp, target)
+
+
+def _read_header(mm: mmap.mmap) -> tuple:
+    if len(mm) < HEADER.size:
+        raise ValueError("index file is truncated")
+    header = HEADER.unpack_from(mm)
+    if header[0] != MAGIC:
+        raise ValueError("not a dictionary index file")
+    return header
+
+
+def is_stale(source: Union[str, Path], target: Union[str, Path]) -> bool:
+    """
+    Check if index `target` is missing, of another format version,
+    or was compiled from a different version of `source`
+    """
+    try:
+        with open(target, "rb") as f:
+            _, version, byteorder, checksum, *_ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return True
+    return (
+        version != VERSION
+        or byteorder != BYTEORDER
+        or checksum != source_checksum(source)
+    )
+
+
+def open_index(path: Union[str, Path]) -> tuple[PackedTrie, WordTable]:
+    """
+    Map binary index into memory without copying its arrays
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    _, version, byteorder, _, alphabet_size, node_count, word_count, blob_size, width = (
+        _read_header(mm)
+    )
+    if version != VERSION or byteorder != BYTEORDER:
+        raise ValueError(f"unsupported index version {version}")
+
+    view = memoryview(mm)
+    sections = [
+        view[offset : offset + size]
+        for offset, size in _layout(alphabet_size, node_count, word_count, blob_size, width)
+    ]
+    alphabet, child_mask, first_child, terminal, masks, letters, offsets, blob = (
+        sections
+    )
+
+    trie = PackedTrie(
+        bytes(alphabet).decode(),
+        child_mask.cast("Q"),
+        first_child.cast("I"),
+        terminal,
+    )
+    table = WordTable(
+        trie.alphabet,
+        masks.cast("Q"),
+        np.frombuffer(letters, dtype=np.uint8).reshape(word_count, width),
+        offsets.cast("I"),
+        blob,
+    )
+    return trie, table
+
+
+def load_index(
+    source: Union[str, Path], target: Union[str, Path, None] = None
+) -> tuple[PackedTrie, WordTable]:
+    """
+    Open index for word list `source`, (re)compiling it first if it is stale.
+    If the index cannot be written, it is built in memory instead.
+    """
+    target = Path(target) if target is not None else Path(source).with_suffix(".idx")
+
+    if is_stale(source, target):
+        logging.info(f"compiling dictionary index {target} from {source}")
+        try:
+            compile_index(source, target)
+        except OSError as e:
+            logging.warning(f"could not write dictionary index {target}: {e}")
+            words = read_words(source)
+            trie = PackedTrie.from_words(words)
+            return trie, WordTable.from_words(words, trie)
+
+    return open_index(target)
+
@@ -0,0 +1,123 @@
+"""
+Rankings of solutions.
+
+Every word has a non-negative cost. A word group costs as much as its cheapest
+word, and a solution as much as its groups together; solutions with the lowest
+cost rank first. Ties are broken by the cheapest words of the groups in order
+(see `tie_key`), so every search engine ranks solutions the same way.
+
+- "letters": fewest letters in total
+- "repeats": fewest letters repeated within a word
+- "frequency": most common words, by the word list in `SOLVER_FREQUENCY_LIST`
+  (one word per line, most common first; words missing from it rank last)
+"""
+import heapq
+import logging
+import math
+import os
+from typing import Iterable, List, Union
+
+
+class Ranking:
+    name = ""
+
+    def word_cost(self, word: str) -> float:
+        raise NotImplementedError
+
+    def group_cost(self, words: List[str]) -> tuple[float, List[str]]:
+        """
+        Cost of word group and its words from the cheapest one
+        """
+        ranked = sorted(words, key=self.word_cost)
+        return self.word_cost(ranked[0]), ranked
+
+
+class FewestLetters(Ranking):
+    name = "letters"
+
+    def word_cost(self, word: str) -> float:
+        return len(word)
+
+
+class FewestRepeats(Ranking):
+    name = "repeats"
+
+    def word_cost(self, word: str) -> float:
+        return len(word) - len(set(word))
+
+
+class CommonWords(Ranking):
+    name = "frequency"
+
+    def __init__(self, path: Union[str, None] = None):
+        path = path or os.getenv("SOLVER_FREQUENCY_LIST")
+        if not path:
+            raise ValueError("frequency ranking needs a word list in SOLVER_FREQUENCY_LIST")
+
+        self.ranks = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if parts:
+                    self.ranks.setdefault(parts[0].lower(), len(self.ranks))
+        logging.info(f"loaded {len(self.ranks)} word frequencies from {path}")
+
+    def word_cost(self, word: str) -> float:
+        # log of the rank, so one rare word does not outweigh all the others,
+        # in integer units so sums do not depend on the order of addition
+        return round(1000 * math.log1p(self.ranks.get(word, len(self.ranks))))
+
+
+def tie_key(ranked: Iterable[List[str]]) -> tuple[str, ...]:
+    """
+    Order of solutions of the same cost, given their groups as ranked by `Ranking.group_cost`.
+    Every word belongs to a single group, so no two solutions have the same key
+    """
+    return tuple(words[0] for words in ranked)
+
+
+class Descending:
+    """
+    Wraps a key to compare in reverse, for keeping the worst of a heap on top
+    """
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other: "Descending") -> bool:
+        return other.key < self.key
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Descending) and self.key == other.key
+
+
+RANKINGS = {ranking.name: ranking for ranking in (FewestLetters, FewestRepeats, CommonWords)}
+
+_rankings = {}
+
+
+def get_ranking(name: str) -> Ranking:
+    """
+    Shared ranking instance by name
+    """
+    if name not in RANKINGS:
+        raise ValueError(f"unknown ranking {name!r}, expected one of {list(RANKINGS)}")
+    if name not in _rankings:
+        _rankings[name] = RANKINGS[name]()
+    return _rankings[name]
+
+
+def top_solutions(
+    solutions: Iterable[List[List[str]]], k: int, ranking: Ranking
+) -> List[List[List[str]]]:
+    """
+    `k` best solutions from a stream, keeping no more than `k` of them at a time.
+    Words in every group of the returned solutions are ordered from the cheapest.
+    """
+    def ranked(solution: List[List[str]]) -> tuple[float, tuple[str, ...], List[List[str]]]:
+        groups = [ranking.group_cost(words) for words in solution]
+        words = [words for _, words in groups]
+        return sum(cost for cost, _ in groups), tie_key(words), words
+
+    return [solution for *_, solution in heapq.nsmallest(k, map(ranked, solutions))]
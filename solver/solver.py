@@ -1,116 +1,380 @@
+import heapq
+import random
+from bisect import bisect_right
 from collections import defaultdict
-from typing import List, Set, Union
+from itertools import islice
+from math import prod
+from typing import Iterable, Iterator, List, Union
 
-from .utils import timed
+from metrics import timed
 
+from .cache import canonical_board, solution_cache
+from .dictionary import Dictionary, get_dictionary
+from .dp import SolutionCounter
+from .ranking import Descending, Ranking, get_ranking, tie_key, top_solutions
+from .utils import PUZZLE_SIZE, contained_masks
 
-class WordTrieNode:
-    """
-    @author Phil McLaughlin (https://github.com/pmclaugh)
-    """
-    def __init__(self, value: str, parent: Union["WordTrieNode", None]):
-        self.value = value
-        self.parent = parent
-        self.children = {}
-        self.valid = False
+ENGINES = ("deepening", "dp", "dfs")
 
-    def get_word(self) -> str:
-        if self.parent is not None:
-            return self.parent.get_word() + self.value
-        else:
-            return self.value
+# results with more meta-solutions than this are not cached
+MAX_CACHED_SOLUTIONS = 1000
 
 
 class LetterBoxed:
     """
     @author Phil McLaughlin (https://github.com/pmclaugh)
     """
-    @timed
-    def __init__(self, input_string: str, dictionary: str, len_threshold=3):
+    @timed("puzzle_build")
+    def __init__(self, input_string: str, dictionary: Dictionary, len_threshold=3):
         # parse the input string (abc-def-ghi-jkl) into set of 4 sides
         self.input_string = input_string.lower()
         self.sides = {side for side in input_string.split("-")}
         self.puzzle_letters = {letter for side in self.sides for letter in side}
         self.len_threshold = len_threshold
 
-        # build trie from newline-delimited .txt word list
-        self.root = WordTrieNode("", None)
-        with open(dictionary) as f:
-            for line in f.readlines():
-                self.add_word(line.strip().lower())
+        # every puzzle letter gets its own bit, so sets of letters are plain ints
+        self.letter_bits = {
+            letter: 1 << i for i, letter in enumerate(sorted(self.puzzle_letters))
+        }
+
+        # trie is prebuilt once per process and shared between puzzles
+        self.dictionary = dictionary
+        self.trie = dictionary.trie
 
         # find all valid words in puzzle
         self.puzzle_words = self.get_puzzle_words()
 
-        # puzzle_graph[starting_letter][ending_letter] = {{letters}: [words]}
-        # e.g. puzzle_graph['f']['s'] = {{'a','e','f','r','s'} : ['fares', 'fears', 'farers', 'fearers']}
+        # puzzle_graph[starting_letter][ending_letter] = {letters_mask: [words]}
+        # e.g. puzzle_graph['f']['s'] = {mask('aefrs') : ['fares', 'fears', 'farers', 'fearers']}
         self.puzzle_graph = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
         for word in self.puzzle_words:
-            self.puzzle_graph[word[0]][word[-1]][frozenset(word)].append(word)
-
-    def add_word(self, word) -> None:
-        node = self.root
-        for char in word:
-            if char not in node.children:
-                node.children[char] = WordTrieNode(char, node)
-            node = node.children[char]
-        node.valid = True
-
-    def _puzzle_words_inner(
-        self, node: WordTrieNode, last_side: str
-    ) -> List[WordTrieNode]:
-        valid_nodes = [node] if node.valid else []
-        if node.children:
-            for next_side in self.sides - {last_side}:
-                for next_letter in next_side:
-                    if next_letter in node.children:
-                        next_node = node.children[next_letter]
-                        valid_nodes += self._puzzle_words_inner(next_node, next_side)
-        return valid_nodes
-
-    @timed
+            self.puzzle_graph[word[0]][word[-1]][self.letters_mask(word)].append(word)
+
+        # edges[starting_letter] = [(letters_mask, ending_letter, [words]), ...]
+        # (sorted, so results do not depend on set iteration order)
+        self.edges = {letter: [] for letter in sorted(self.puzzle_letters)}
+        for first_letter, by_last in self.puzzle_graph.items():
+            for last_letter, by_mask in by_last.items():
+                for mask, words in by_mask.items():
+                    self.edges[first_letter].append((mask, last_letter, words))
+
+        # edge_masks[starting_letter][letters_mask] = [positions in edges[starting_letter]],
+        # contained[starting_letter][mask] = 1 if any of those letter masks contains mask;
+        # built on first use, for looking up edges that complete a chain
+        self.edge_masks = {}
+        self.contained = {}
+
+        # layers[k][(letters_mask, last_letter)] = [(previous state, words), ...]
+        # for incomplete chains of k word groups, extended one layer at a time by `deepen`
+        # completions[k] = [(state in layers[k - 1], words), ...] for solutions of k groups
+        self.depth = 0
+        self.layers = [{(0, None): []}]
+        self.counts = [{(0, None): (1, 1)}]
+        self.completions = [[]]
+
+    def letters_mask(self, letters: str) -> int:
+        mask = 0
+        for letter in letters:
+            mask |= self.letter_bits[letter]
+        return mask
+
+    @timed("puzzle_words")
     def get_puzzle_words(self) -> List[str]:
-        all_valid_nodes = []
-        for starting_side in self.sides:
-            for starting_letter in starting_side:
-                if starting_letter in self.root.children:
-                    all_valid_nodes += self._puzzle_words_inner(
-                        self.root.children[starting_letter], starting_side
-                    )
-        return [node.get_word() for node in all_valid_nodes]
-
-    def _find_solutions_inner(
-        self, path_words: List[List[str]], letters: Set[str], next_letter: str
-    ) -> List[List[List[str]]]:
-        if len(letters) == 12:
-            return [path_words]
-        elif len(path_words) == self.len_threshold:
-            return []
+        # filtered from the precomputed word table with numpy, in trie walk order
+        return self.dictionary.words.board_words(
+            [self.trie.letters_mask(side) for side in sorted(self.sides)]
+        )
+
+    @timed("search")
+    def find_all_solutions(self) -> List[List[List[str]]]:
+        """
+        Find all chains of at most `len_threshold` word groups covering all letters.
+
+        Iterative depth-first search over `edges`: the path is a single list
+        that is pushed to and popped from, and is only copied for solutions.
+        """
+        len_threshold = self.len_threshold
+        edges = self.edges
 
-        solutions = []
-        for last_letter in self.puzzle_graph[next_letter]:
-            for letter_edge, edge_words in self.puzzle_graph[next_letter][
-                last_letter
-            ].items():
-                if letter_edge - letters:
-                    solutions += self._find_solutions_inner(
-                        path_words + [edge_words], letters | letter_edge, last_letter
-                    )
-        return solutions
-
-    @timed
-    def find_all_solutions(self) -> List[List[str]]:
         all_solutions = []
-        for first_letter in self.puzzle_letters:
-            for last_letter in self.puzzle_letters:
-                for letter_edge, edge_words in self.puzzle_graph[first_letter][
-                    last_letter
-                ].items():
-                    all_solutions += self._find_solutions_inner(
-                        [edge_words], letter_edge, last_letter
-                    )
+        for first_letter in self.edges:
+            for mask, last_letter, words in edges[first_letter]:
+                if mask.bit_count() == PUZZLE_SIZE:
+                    all_solutions.append([words])
+                    continue
+                if len_threshold <= 1:
+                    continue
+
+                path = [words]
+                stack = [(mask, iter(edges[last_letter]))]
+                while stack:
+                    covered, next_edges = stack[-1]
+                    for edge_mask, edge_last, edge_words in next_edges:
+                        # next word must bring at least one new letter
+                        if not edge_mask & ~covered:
+                            continue
+                        letters = covered | edge_mask
+                        if letters.bit_count() == PUZZLE_SIZE:
+                            all_solutions.append(path + [edge_words])
+                        elif len(path) + 1 < len_threshold:
+                            path.append(edge_words)
+                            stack.append((letters, iter(edges[edge_last])))
+                            break
+                    else:
+                        stack.pop()
+                        path.pop()
+
         return all_solutions
 
+    def _next_edges(self, last_letter: Union[str, None]) -> List[tuple]:
+        if last_letter is None:
+            return [edge for first_letter in self.edges for edge in self.edges[first_letter]]
+        return self.edges[last_letter]
+
+    def _completing_edges(self, covered: int, last_letter: Union[str, None]) -> List[tuple]:
+        """
+        Edges after `last_letter` that cover all letters missing from `covered`, in `edges` order.
+
+        Whether there are any is read from the subsets of edge masks marked in `contained`.
+        The masks of such edges are the missing letters plus a subset of the
+        covered ones, so when there are fewer such subsets than edges, they are
+        looked up directly instead of testing every edge.
+        """
+        full = (1 << PUZZLE_SIZE) - 1
+        missing = full & ~covered
+        if last_letter is None:
+            return [edge for edge in self._next_edges(None) if edge[0] == full]
+
+        if last_letter not in self.contained:
+            masks = defaultdict(list)
+            for position, (mask, _, _) in enumerate(self.edges[last_letter]):
+                masks[mask].append(position)
+            self.edge_masks[last_letter] = masks
+            self.contained[last_letter] = contained_masks(masks, PUZZLE_SIZE)
+        if not self.contained[last_letter][missing]:
+            return []
+
+        edges = self.edges[last_letter]
+        if 1 << covered.bit_count() >= len(edges):
+            return [edge for edge in edges if edge[0] & missing == missing]
+
+        masks = self.edge_masks[last_letter]
+        positions = []
+        subset = covered
+        while True:
+            positions.extend(masks.get(missing | subset, ()))
+            if not subset:
+                break
+            subset = (subset - 1) & covered
+        return [edges[position] for position in sorted(positions)]
+
+    @timed("search")
+    def deepen(self) -> int:
+        """
+        Find chains that cover all letters with exactly `depth + 1` word groups.
+
+        Incomplete chains are kept between calls in `layers`, merged by
+        (letters_mask, last_letter) state with back-pointers to the previous
+        layer, so prefixes explored at previous depths are never visited
+        again. The layer for the next depth is built when the next call asks
+        for it, which keeps the final (largest) depth scan free of allocations.
+
+        Found chains are not spelled out, only their last state and word group
+        are recorded in `completions`; returns the number of meta-solutions.
+        """
+        if len(self.layers) <= self.depth:
+            layer = defaultdict(list)
+            for state in self.layers[-1]:
+                covered, last_letter = state
+                for edge_mask, edge_last, edge_words in self._next_edges(last_letter):
+                    # next word must bring at least one new letter
+                    if not edge_mask & ~covered:
+                        continue
+                    letters = covered | edge_mask
+                    if letters.bit_count() != PUZZLE_SIZE:
+                        layer[letters, edge_last].append((state, edge_words))
+            self.layers.append(dict(layer))
+            self._count_layer()
+
+        counts = self.counts[self.depth]
+        completions = []
+        found = 0
+        for state, (metas, _) in counts.items():
+            covered, last_letter = state
+            for _, _, edge_words in self._completing_edges(covered, last_letter):
+                completions.append((state, edge_words))
+                found += metas
+
+        self.depth += 1
+        self.completions.append(completions)
+        return found
+
+    def _count_layer(self) -> None:
+        # counts[k][state] = (group chains, word chains) leading to state
+        previous = self.counts[-1]
+        counts = {}
+        for state, incoming in self.layers[-1].items():
+            metas = words = 0
+            for parent, edge_words in incoming:
+                parent_metas, parent_words = previous[parent]
+                metas += parent_metas
+                words += parent_words * len(edge_words)
+            counts[state] = (metas, words)
+        self.counts.append(counts)
+
+    def _iter_chains(self, depth: int, state: tuple) -> Iterator[tuple]:
+        if depth == 0:
+            yield ()
+            return
+        for parent, words in self.layers[depth][state]:
+            for path in self._iter_chains(depth - 1, parent):
+                yield (*path, words)
+
+    def _unrank_chain(self, depth: int, state: tuple, index: int) -> tuple:
+        # chain number `index` in `_iter_chains(depth, state)` order
+        path = []
+        while depth:
+            for parent, words in self.layers[depth][state]:
+                metas = self.counts[depth - 1][parent][0]
+                if index < metas:
+                    break
+                index -= metas
+            path.append(words)
+            state = parent
+            depth -= 1
+        return tuple(reversed(path))
+
+    def count_solutions(self, len_threshold: Union[int, None] = None) -> tuple[int, int]:
+        """
+        Number of meta-solutions and full (word) solutions found by `deepen` so far,
+        of at most `len_threshold` word groups if given, computed from chain counts
+        without spelling out any paths
+        """
+        metas = words = 0
+        for depth, completions in enumerate(self.completions[: None if len_threshold is None else len_threshold + 1]):
+            for state, edge_words in completions:
+                state_metas, state_words = self.counts[depth - 1][state]
+                metas += state_metas
+                words += state_words * len(edge_words)
+        return metas, words
+
+    def iter_solutions(self) -> Iterator[List[List[str]]]:
+        """
+        Lazily yield meta-solutions found by `deepen` so far, shortest first
+        """
+        for depth, completions in enumerate(self.completions):
+            for state, edge_words in completions:
+                for path in self._iter_chains(depth - 1, state):
+                    yield [*path, edge_words]
+
+    @timed("enumerate")
+    def sample_solutions(self, k: int, seed: Union[int, None] = None) -> List[List[List[str]]]:
+        """
+        Reproducible uniform random sample of `k` meta-solutions found by `deepen`
+        so far. Sampled indices are mapped straight to paths through chain
+        counts, so the cost does not depend on the number of solutions.
+        """
+        # (first solution index, depth, state, edge_words) for every completion
+        entries = []
+        total = 0
+        for depth, completions in enumerate(self.completions):
+            for state, edge_words in completions:
+                entries.append((total, depth, state, edge_words))
+                total += self.counts[depth - 1][state][0]
+
+        starts = [entry[0] for entry in entries]
+        sample = []
+        for index in random.Random(seed).sample(range(total), min(k, total)):
+            start, depth, state, edge_words = entries[bisect_right(starts, index) - 1]
+            path = self._unrank_chain(depth - 1, state, index - start)
+            sample.append([*path, edge_words])
+        return sample
+
+    @timed("enumerate")
+    def rank_solutions(self, k: int, ranking: Ranking) -> List[List[List[str]]]:
+        """
+        `k` best meta-solutions found by `deepen` so far by `ranking`, with words
+        of every group ordered from the cheapest one.
+
+        Chains are enumerated backwards from completions while the best `k` are
+        kept in a heap. The cheapest cost of reaching every state is computed
+        first, so chains that cannot beat the heap are skipped entirely. Chains
+        that can only tie with the worst one are skipped by the lowest tie key
+        of those cheapest prefixes, computed only for states where that happens.
+        """
+        groups = {}
+
+        def group_cost(words: List[str]) -> float:
+            if id(words) not in groups:
+                groups[id(words)] = ranking.group_cost(words)
+            return groups[id(words)][0]
+
+        def chain_key(chain: tuple) -> tuple[str, ...]:
+            return tie_key(groups[id(words)][1] for words in chain)
+
+        # best[d][state] = lowest cost of a chain of d groups ending in state
+        best = [{(0, None): 0}]
+        for depth in range(1, len(self.completions) - 1):
+            previous = best[-1]
+            best.append(
+                {
+                    state: min(previous[parent] + group_cost(words) for parent, words in incoming)
+                    for state, incoming in self.layers[depth].items()
+                }
+            )
+
+        keys = {}
+
+        def best_key(depth: int, state: tuple) -> tuple[str, ...]:
+            # lowest tie key among the cheapest chains of `depth` groups ending in state,
+            # all of them have `depth` groups, so it bounds the keys of their extensions
+            if not depth:
+                return ()
+            if (depth, state) not in keys:
+                previous, cost = best[depth - 1], best[depth][state]
+                keys[depth, state] = min(
+                    best_key(depth - 1, parent) + chain_key((words,))
+                    for parent, words in self.layers[depth][state]
+                    if previous[parent] + groups[id(words)][0] == cost
+                )
+            return keys[depth, state]
+
+        if k <= 0:
+            return []
+
+        # heap of (-cost, descending tie key, chain) holds the best k chains found, worst on top
+        heap = []
+        for depth, completions in enumerate(self.completions):
+            for state, edge_words in completions:
+                stack = [(depth - 1, state, group_cost(edge_words), (edge_words,))]
+                while stack:
+                    chain_depth, chain_state, cost, chain = stack.pop()
+                    if len(heap) == k:
+                        bound = best[chain_depth][chain_state] + cost
+                        if bound > -heap[0][0]:
+                            continue
+                        # chains of the same cost may still win on the tie key
+                        if (
+                            bound == -heap[0][0]
+                            and best_key(chain_depth, chain_state) + chain_key(chain) >= heap[0][1].key
+                        ):
+                            continue
+                    if not chain_depth:
+                        entry = (-cost, Descending(chain_key(chain)), chain)
+                        if len(heap) < k:
+                            heapq.heappush(heap, entry)
+                        else:
+                            heapq.heappushpop(heap, entry)
+                        continue
+                    # pushed in reverse, so chains are visited in `_iter_chains` order
+                    for parent, words in reversed(self.layers[chain_depth][chain_state]):
+                        stack.append((chain_depth - 1, parent, cost + group_cost(words), (words, *chain)))
+
+        return [
+            [groups[id(words)][1] for words in chain]
+            for _, _, chain in sorted(heap, reverse=True)
+        ]
+
 
 def puzzle_from_string(input_string: str) -> str:
     """
@@ -120,30 +384,166 @@ def puzzle_from_string(input_string: str) -> str:
     SBI
     RAN
     """
-    input_string = input_string.replace("\n", "-").lower().strip()
-    
-    if len(input_string) - 3 < 12:
+    # sides may also be separated by dashes or spaces
+    input_string = "-".join(input_string.lower().split())
+    letters = input_string.replace("-", "")
+
+    # e.g. "?" for letters OCR could not recognize, no word can ever use them
+    others = sorted({char for char in letters if not char.isalpha()})
+    if others:
+        raise ValueError(f"puzzle can only have letters, got {''.join(others)!r}")
+    if len(letters) < PUZZLE_SIZE:
         raise ValueError("not enough letters for correct puzzle")
+    # letters are bits of a PUZZLE_SIZE-bit mask, an extra one would not fit
+    if len(set(letters)) > PUZZLE_SIZE:
+        raise ValueError(f"too many letters for correct puzzle: {len(set(letters))}, expected {PUZZLE_SIZE}")
 
     return input_string
 
 
-def solve(puzzle: str, accepted_len: tuple[int, int] = (3, 6)) -> tuple[int, int, List[List[str]]]:
-    puzzle = puzzle_from_string(puzzle)
-    puzzle = LetterBoxed(puzzle, "solver/words.txt", accepted_len[0])
-    
-    meta_solutions = []
-    len_threshold = accepted_len[0] - 1
-    while not len(meta_solutions) and len_threshold < accepted_len[1]:
-        len_threshold += 1
-        puzzle.len_threshold = len_threshold
-        meta_solutions = puzzle.find_all_solutions()
-
-    full_count = 0
-    for meta_solution in meta_solutions:
-        count = 1
-        for element in meta_solution:
-            count *= len(element)
-        full_count += count
-
-    return len_threshold, full_count, meta_solutions
+def _sample_stream(
+    solutions: Iterable[List[List[str]]], total: int, k: int, seed: Union[int, None]
+) -> List[List[List[str]]]:
+    # pick sampled positions while streaming, keeping the sampled order
+    positions = {
+        index: i for i, index in enumerate(random.Random(seed).sample(range(total), min(k, total)))
+    }
+    sample = [None] * len(positions)
+    for index, solution in enumerate(islice(solutions, max(positions, default=-1) + 1)):
+        if index in positions:
+            sample[positions[index]] = solution
+    return sample
+
+
+def solution_key(
+    puzzle: str,
+    accepted_len: tuple[int, int] = (3, 6),
+    engine: str = "deepening",
+    limit: Union[int, None] = None,
+    seed: Union[int, None] = None,
+    ranking: Union[str, None] = None,
+    dictionary: Union[str, None] = None,
+) -> str:
+    """
+    Key of the `solve` result for these arguments in `solution_cache`,
+    the same for rotated or reordered boards
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+    if ranking is not None:
+        get_ranking(ranking)  # fail early on unknown rankings
+        seed = None
+
+    puzzle = canonical_board(puzzle_from_string(puzzle))
+    return (
+        f"{puzzle}|{accepted_len[0]}-{accepted_len[1]}|{engine}|{limit}|{seed}|{ranking}"
+        f"|{get_dictionary(dictionary).version}"
+    )
+
+
+def store_solution(key: str, result: tuple[int, int, List[List[str]]]) -> None:
+    """
+    Put a `solve` result into `solution_cache`, unless it has too many solutions
+    """
+    if len(result[2]) <= MAX_CACHED_SOLUTIONS:
+        solution_cache.put(key, result)
+
+
+def solve(
+    puzzle: str,
+    accepted_len: tuple[int, int] = (3, 6),
+    engine: str = "deepening",
+    limit: Union[int, None] = None,
+    seed: Union[int, None] = None,
+    ranking: Union[str, None] = None,
+    dictionary: Union[str, None] = None,
+    cache: bool = True,
+) -> tuple[int, int, List[List[str]]]:
+    """
+    Find solutions with the fewest words within `accepted_len` range,
+    using words of the named `dictionary` (see `solver.dictionary`).
+
+    `engine` selects the search:
+    - "deepening" extends chains one word at a time with `LetterBoxed.deepen`,
+      keeping the frontier of incomplete chains between depths
+    - "dp" counts solutions on the same layers with `SolutionCounter`, and
+      enumerates depth-first only paths that lead to a solution at that depth
+    - "dfs" reruns exhaustive `LetterBoxed.find_all_solutions` at every depth,
+      slow on deep boards, kept as the reference for the other two
+
+    At most `limit` meta-solutions are returned: the best ones by `ranking`
+    (see `solver.ranking`), otherwise the first ones found or, if `seed` is given,
+    a reproducible random sample. The returned count always covers all solutions.
+
+    Results are cached in `solution_cache` by canonical board, so rotated
+    or reordered boards share one entry. With `cache` off it is neither
+    read nor written, for callers that keep the cache themselves.
+    """
+    key = solution_key(puzzle, accepted_len, engine, limit, seed, ranking, dictionary)
+    if ranking is not None:
+        seed = None
+
+    if cache:
+        cached = solution_cache.get(key)
+        if cached is not None:
+            return tuple(cached)
+
+    puzzle = canonical_board(puzzle_from_string(puzzle))
+    result = _solve(
+        LetterBoxed(puzzle, get_dictionary(dictionary), accepted_len[0]),
+        accepted_len,
+        engine,
+        limit,
+        seed,
+        ranking,
+    )
+    if cache:
+        store_solution(key, result)
+    return result
+
+
+def _solve(
+    puzzle: LetterBoxed,
+    accepted_len: tuple[int, int],
+    engine: str,
+    limit: Union[int, None],
+    seed: Union[int, None],
+    ranking: Union[str, None],
+) -> tuple[int, int, List[List[str]]]:
+    if engine == "dp":
+        counter = SolutionCounter(puzzle)
+        len_threshold = counter.min_len_threshold(accepted_len)
+        meta_count, full_count = counter.count(len_threshold)
+        solutions = counter.iter_solutions(len_threshold)
+    elif engine == "dfs":
+        solutions = []
+        len_threshold = accepted_len[0] - 1
+        while not solutions and len_threshold < accepted_len[1]:
+            len_threshold += 1
+            puzzle.len_threshold = len_threshold
+            solutions = puzzle.find_all_solutions()
+        meta_count = len(solutions)
+        full_count = sum(prod(len(words) for words in solution) for solution in solutions)
+    else:
+        # solutions shorter than accepted_len[0] are still accepted, as with len_threshold
+        meta_count = 0
+        while puzzle.depth < accepted_len[1] and (
+            puzzle.depth < accepted_len[0] or not meta_count
+        ):
+            meta_count += puzzle.deepen()
+        len_threshold = max(puzzle.depth, accepted_len[0])
+        _, full_count = puzzle.count_solutions()
+
+        if ranking is not None:
+            k = meta_count if limit is None else limit
+            return len_threshold, full_count, puzzle.rank_solutions(k, get_ranking(ranking))
+        if seed is not None and limit is not None:
+            return len_threshold, full_count, puzzle.sample_solutions(limit, seed)
+        solutions = puzzle.iter_solutions()
+
+    if ranking is not None:
+        k = meta_count if limit is None else limit
+        return len_threshold, full_count, top_solutions(solutions, k, get_ranking(ranking))
+    if seed is not None and limit is not None:
+        return len_threshold, full_count, _sample_stream(solutions, meta_count, limit, seed)
+    return len_threshold, full_count, list(islice(solutions, limit))
@@ -0,0 +1,143 @@
+from array import array
+from typing import Iterable, Iterator, Sequence, Union
+
+
+class PackedTrie:
+    """
+    Trie stored in flat arrays instead of one Python object per node.
+
+    Nodes are integer ids laid out in breadth-first order, so the children
+    of every node occupy a contiguous id range starting at `first_child[node]`.
+    `child_mask[node]` has bit `i` set if the node has a child for
+    `alphabet[i]`, and the child id is found by ranking that bit:
+
+        first_child[node] + popcount(child_mask[node] & (bit - 1))
+
+    Terminal (end of word) nodes are marked in the `terminal` bitset.
+    """
+    __slots__ = ("alphabet", "letter_index", "child_mask", "first_child", "terminal")
+
+    def __init__(
+        self,
+        alphabet: str,
+        child_mask: Sequence[int],
+        first_child: Sequence[int],
+        terminal: Union[bytearray, memoryview],
+    ):
+        self.alphabet = alphabet
+        self.letter_index = {letter: i for i, letter in enumerate(alphabet)}
+        self.child_mask = child_mask
+        self.first_child = first_child
+        self.terminal = terminal
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "PackedTrie":
+        words = sorted(set(words))
+        alphabet = "".join(sorted({letter for word in words for letter in word}))
+        letter_index = {letter: i for i, letter in enumerate(alphabet)}
+
+        child_mask = array("Q", [0])
+        first_child = array("I", [0])
+        terminal = bytearray()
+        terminal_ids = []
+
+        # breadth-first over ranges of sorted words sharing a prefix of length `depth`
+        queue = [(0, 0, len(words), 0)]
+        next_id = 1
+        for node, lo, hi, depth in queue:
+            # words ending here sort before their extensions
+            if lo < hi and len(words[lo]) == depth:
+                terminal_ids.append(node)
+                lo += 1
+
+            mask = 0
+            first_child[node] = next_id
+            while lo < hi:
+                letter = words[lo][depth]
+                group_hi = lo + 1
+                while group_hi < hi and words[group_hi][depth] == letter:
+                    group_hi += 1
+
+                mask |= 1 << letter_index[letter]
+                queue.append((next_id, lo, group_hi, depth + 1))
+                child_mask.append(0)
+                first_child.append(0)
+                next_id += 1
+                lo = group_hi
+            child_mask[node] = mask
+
+        terminal = bytearray((next_id + 7) // 8)
+        for node in terminal_ids:
+            terminal[node >> 3] |= 1 << (node & 7)
+
+        return cls(alphabet, child_mask, first_child, terminal)
+
+    def __len__(self) -> int:
+        return len(self.child_mask)
+
+    def is_terminal(self, node: int) -> bool:
+        return bool(self.terminal[node >> 3] & (1 << (node & 7)))
+
+    def child(self, node: int, letter: str) -> int:
+        """
+        Return id of the child of `node` for `letter`, or 0 if there is none
+        """
+        index = self.letter_index.get(letter)
+        if index is None:
+            return 0
+        bit = 1 << index
+        mask = self.child_mask[node]
+        if not mask & bit:
+            return 0
+        return self.first_child[node] + (mask & (bit - 1)).bit_count()
+
+    def __contains__(self, word: str) -> bool:
+        node = 0
+        for letter in word:
+            node = self.child(node, letter)
+            if not node:
+                return False
+        return self.is_terminal(node)
+
+    def letters_mask(self, letters: Iterable[str]) -> int:
+        """
+        Bitmask of `letters` in this trie's alphabet; unknown letters are ignored
+        """
+        mask = 0
+        for letter in letters:
+            index = self.letter_index.get(letter)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    def walk(self, next_letters: dict[int, int], start_mask: int) -> Iterator[str]:
+        """
+        Yield every word whose first letter is in `start_mask` and
+        in which each letter with index `i` is followed by a letter
+        from `next_letters[i]` mask. Boards are solved with the faster
+        `WordTable.board_words`, this walk is the reference it is tested against
+        """
+        alphabet = self.alphabet
+        child_mask = self.child_mask
+        first_child = self.first_child
+        terminal = self.terminal
+
+        stack = [(0, "", start_mask)]
+        while stack:
+            node, prefix, allowed = stack.pop()
+            if terminal[node >> 3] & (1 << (node & 7)):
+                yield prefix
+
+            node_mask = child_mask[node]
+            candidates = node_mask & allowed
+            while candidates:
+                bit = candidates & -candidates
+                candidates ^= bit
+                index = bit.bit_length() - 1
+                stack.append(
+                    (
+                        first_child[node] + (node_mask & (bit - 1)).bit_count(),
+                        prefix + alphabet[index],
+                        next_letters[index],
+                    )
+                )
@@ -1,13 +1,19 @@
-from functools import wraps
-from datetime import datetime
-import logging
-
-def timed(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start = datetime.now()
-        result = func(*args, **kwargs)
-        end = datetime.now()
-        logging.info(f"{args[0].__class__.__name__}.{func.__name__} ran in: {end - start} for puzzle: {args[0].input_string}")
-        return result
-    return wrapper
\ No newline at end of file
+from typing import Iterable
+
+import numpy as np
+
+# number of distinct letters on a Letter Boxed board
+PUZZLE_SIZE = 12
+
+
+def contained_masks(masks: Iterable[int], bits: int) -> bytes:
+    """
+    For every mask of `bits` bits, 1 if any of `masks` contains it, 0 otherwise
+    """
+    contained = np.zeros(1 << bits, dtype=np.uint8)
+    contained[np.fromiter(masks, dtype=np.int64)] = 1
+    # spread over subsets one bit at a time: masks with the bit mark the ones without it
+    for bit in range(bits):
+        pairs = contained.reshape(-1, 2, 1 << bit)
+        pairs[:, 0] |= pairs[:, 1]
+    return contained.tobytes()
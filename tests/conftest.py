@@ -0,0 +1,31 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# the bot package creates its Bot on import, which needs a token of the right format
+os.environ.setdefault("TELEGRAM_API_TOKEN", "123:test")
+
+BOARDS_PATH = Path(__file__).resolve().parent.parent / "benchmarks" / "boards.txt"
+
+
+def read_boards() -> list[str]:
+    with open(BOARDS_PATH) as file:
+        lines = (line.split("#")[0].strip() for line in file)
+        return [line.replace(" ", "-").lower() for line in lines if line]
+
+
+BOARDS = read_boards()
+
+
+@pytest.fixture
+def solution_cache(monkeypatch):
+    """
+    Empty solution cache used by `solve`, so results are not shared between tests
+    """
+    from solver import solver
+    from solver.cache import SolutionCache
+
+    cache = SolutionCache(maxsize=16)
+    monkeypatch.setattr(solver, "solution_cache", cache)
+    return cache
@@ -0,0 +1,30 @@
+import numpy as np
+
+from ocr.backends import _assign_to_tiles
+from ocr.imageregion import ImageRegion, strip_region_images
+
+
+def region(height: int, width: int) -> ImageRegion:
+    region = ImageRegion((0, 0, height, width))
+    region.image = np.zeros((height, width))
+    return region
+
+
+def test_strip_tiles_hold_centers_of_their_regions():
+    regions = [region(30, 20), region(24, 31), region(28, 12), region(30, 30)]
+    strip, pitch, offset = strip_region_images(regions)
+    # dark pixels of every region are on its own tile of the white strip
+    columns = np.flatnonzero((strip < 0.5).any(axis=0))
+    runs = np.split(columns, np.flatnonzero(np.diff(columns) > 1) + 1)
+    assert len(runs) == len(regions)
+
+    symbols = [(letter, (run[0] + run[-1] + 1) / 2) for letter, run in zip("ABCD", runs)]
+    # letters at the very edges of their region belong to it as well
+    symbols += [("E", runs[1][0]), ("F", runs[2][-1] + 1)]
+    assert _assign_to_tiles(symbols, len(regions), pitch, offset) == ["A", "B", "C", "D"]
+    assert _assign_to_tiles(symbols[4:], len(regions), pitch, offset) == [None, "E", "F", None]
+
+
+def test_first_letter_of_a_tile_is_kept_and_others_ignored():
+    symbols = [(" ", 15), ("A", 15), ("B", 18), ("C", -5), ("D", 200), ("E", 30)]
+    assert _assign_to_tiles(symbols, 3, pitch=20, offset=5) == ["A", "E", None]
@@ -0,0 +1,73 @@
+import multiprocessing
+
+from solver import solution_key, solve
+from solver.cache import SolutionCache, canonical_board
+
+
+def test_canonical_board_ignores_side_and_letter_order():
+    board = canonical_board("cmu-zoh-sbi-ran")
+    assert board == "anr-bis-cmu-hoz"
+    assert canonical_board("ran-sbi-zoh-cmu") == board
+    assert canonical_board("umc-hoz-ibs-nar") == board
+    assert canonical_board("abc-def-ghi-jkl") != board
+
+
+def test_solution_key_is_shared_by_rotated_boards():
+    key = solution_key("CMU\nZOH\nSBI\nRAN", (3, 6), limit=20, ranking="letters")
+    assert solution_key("nar-ibs-cmu-zoh", (3, 6), limit=20, ranking="letters") == key
+    # a seed does not matter for ranked results
+    assert solution_key("cmu-zoh-sbi-ran", (3, 6), limit=20, seed=1, ranking="letters") == key
+
+    assert solution_key("cmu-zoh-sbi-ran", (3, 6), limit=10, ranking="letters") != key
+    assert solution_key("cmu-zoh-sbi-ran", (2, 6), limit=20, ranking="letters") != key
+    assert solution_key("cmu-zoh-sbi-ran", (3, 6), engine="dp", limit=20, ranking="letters") != key
+
+
+def test_solve_reads_rotated_boards_from_cache(solution_cache):
+    result = solve("cmu-zoh-sbi-ran", (3, 6), limit=20, ranking="letters")
+    assert solution_cache.stats()["misses"] == 1
+
+    assert solve("NAR\nIBS\nHOZ\nUMC", (3, 6), limit=20, ranking="letters") == result
+    assert solution_cache.stats()["hits"] == 1
+
+    solve("cmu-zoh-sbi-ran", (3, 6), limit=20, ranking="letters", cache=False)
+    assert solution_cache.stats()["hits"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SolutionCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_disk_cache_survives_new_instances(tmp_path):
+    path = tmp_path / "solutions.db"
+    SolutionCache(maxsize=0, path=path).put("board", [3, 1, [[["word"]]]])
+    cache = SolutionCache(maxsize=0, path=path)
+    assert cache.get("board") == [3, 1, [[["word"]]]]
+    assert cache.stats()["disk_hits"] == 1
+
+
+# opened in the test process and inherited by forked pool workers
+_forked_cache = None
+
+
+def _put_and_get(i: int) -> tuple:
+    _forked_cache.put(f"child {i}", [i])
+    return _forked_cache.get(f"child {i}"), _forked_cache.get("parent")
+
+
+def test_disk_cache_reconnects_in_forked_processes(tmp_path, monkeypatch):
+    cache = SolutionCache(maxsize=0, path=tmp_path / "solutions.db")
+    cache.put("parent", [0])
+    monkeypatch.setattr(__import__(__name__, fromlist=["_"]), "_forked_cache", cache)
+
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        results = pool.map(_put_and_get, range(4))
+
+    assert results == [([i], [0]) for i in range(4)]
+    assert cache.get("child 3") == [3]
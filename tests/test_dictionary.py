@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+from solver.dictionary import DEFAULT_DICTIONARY_PATH, dictionary_paths, load_dictionary
+
+
+def test_dictionary_paths_from_spec():
+    assert dictionary_paths("") == {"default": DEFAULT_DICTIONARY_PATH}
+    assert dictionary_paths(" nyt = /data/nyt.txt,,large=/data/large.txt, ") == {
+        "default": DEFAULT_DICTIONARY_PATH,
+        "nyt": Path("/data/nyt.txt"),
+        "large": Path("/data/large.txt"),
+    }
+    # the bundled list can be replaced
+    assert dictionary_paths("default=/data/words.txt") == {"default": Path("/data/words.txt")}
+
+
+@pytest.mark.parametrize("spec", ["nyt", "=/data/nyt.txt", "nyt=", "nyt=/data/nyt.txt,large"])
+def test_dictionary_paths_need_names_and_paths(spec):
+    with pytest.raises(ValueError, match="expected name=path"):
+        dictionary_paths(spec)
+
+
+def test_identical_word_lists_share_one_dictionary(tmp_path):
+    words = "cab\nbead\nace\n"
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first = tmp_path / "a" / "words.txt"
+    second = tmp_path / "b" / "words.txt"
+    other = tmp_path / "other.txt"
+    first.write_text(words)
+    second.write_text(words)
+    other.write_text(words + "dace\n")
+
+    dictionary = load_dictionary(first)
+    assert load_dictionary(second) is dictionary
+    assert load_dictionary(tmp_path / "a" / ".." / "a" / "words.txt") is dictionary
+    assert load_dictionary(other) is not dictionary
+    assert (dictionary.word_count, load_dictionary(other).word_count) == (3, 4)
+    # only the first list got an index
+    assert (tmp_path / "a" / "words.idx").exists()
+    assert not (tmp_path / "b" / "words.idx").exists()
@@ -0,0 +1,33 @@
+import string
+
+import numpy as np
+import pytest
+
+from ocr.build_glyphs import EXAMPLES, example_glyphs, rendered_glyphs
+from ocr.glyphs import GlyphClassifier, glyph_features
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return GlyphClassifier.load()
+
+
+@pytest.mark.parametrize("path", EXAMPLES)
+def test_example_boards_are_recognized(classifier, path):
+    result = classifier.classify(example_glyphs(path))
+    assert "".join(letter for letter, _ in result) == EXAMPLES[path]
+    assert all(0.5 < confidence <= 1 for _, confidence in result)
+
+
+def test_rendered_letters_are_recognized(classifier):
+    for letter in string.ascii_uppercase:
+        glyph = rendered_glyphs(letter)[-1]
+        # a letter scaled up and moved on its tile is the same letter
+        glyph = np.pad(np.kron(glyph, np.ones((2, 2))), ((10, 0), (0, 25)), constant_values=1)
+        assert classifier.classify([glyph])[0][0] == letter
+
+
+def test_blank_images_are_unknown(classifier):
+    assert classifier.classify([]) == []
+    assert classifier.classify([np.ones((20, 20))]) == [("?", 0.0)]
+    assert not glyph_features(np.ones((20, 20))).any()
@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ocr.imageregion import Frame, ImageRegion
+from ocr.ocr import crop_image, load_image
+
+
+def encode(image: Image.Image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("format", ["PNG", "JPEG"])
+def test_large_images_are_downscaled_on_decode(format):
+    data = encode(Image.new("RGB", (4000, 1000), (200, 200, 200)), format)
+    image, scale = load_image(data, max_size=1280)
+    assert image.dtype == np.uint8
+    assert image.shape == (320, 1280)
+    assert scale == pytest.approx(1280 / 4000)
+    assert abs(int(image[160, 640]) - 200) <= 1
+
+
+def test_small_images_keep_their_size():
+    image, scale = load_image(io.BytesIO(encode(Image.new("L", (300, 200), 17), "PNG")))
+    assert image.shape == (200, 300)
+    assert scale == 1.0
+    assert (image == 17).all()
+
+
+def test_colours_are_converted_to_luminance_and_transparency_to_white():
+    rgba = Image.new("RGBA", (4, 1), (0, 0, 0, 0))
+    rgba.putpixel((1, 0), (255, 0, 0, 255))
+    rgba.putpixel((2, 0), (0, 255, 0, 255))
+    rgba.putpixel((3, 0), (0, 0, 255, 255))
+    image, _ = load_image(encode(rgba, "PNG"))
+    # same weights as skimage.color.rgb2gray
+    assert image[0].tolist() == [255, 54, 182, 18]
+
+
+def test_frame_maps_working_image_back_to_source():
+    frame = Frame(0, 0, 0.5)
+    assert frame.to_source((10, 20, 30, 40)) == (20, 40, 60, 80)
+    assert frame.shifted(5, 7).to_source((0, 0, 10, 10)) == (10, 14, 30, 34)
+
+
+def test_regions_of_a_crop_keep_their_source_position():
+    data = encode(Image.new("L", (2560, 1280), 255), "PNG")
+    image, scale = load_image(data, max_size=1280)
+    crop, frame = crop_image(image, np.array([100, 50]), np.array([200, 300]), frame=Frame(0, 0, scale))
+    assert frame == Frame(50, 100, 0.5)
+    assert crop.shape == (200, 300)
+
+    region = ImageRegion((10, 20, 30, 40), frame=frame)
+    assert region.source_bbox == (120, 240, 160, 280)
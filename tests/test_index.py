@@ -0,0 +1,78 @@
+import pytest
+
+from solver import index
+from solver.index import HEADER, compile_index, is_stale, load_index, open_index, read_words
+
+WORDS = ["Cab", "abaca", "bead", "cede", "dace", "", "ace"]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(WORDS) + "\n")
+    return path
+
+
+def test_index_is_stale_until_compiled(source, tmp_path):
+    target = tmp_path / "words.idx"
+    assert is_stale(source, target)
+    compile_index(source, target)
+    assert not is_stale(source, target)
+
+    source.write_text("\n".join(WORDS + ["bade"]) + "\n")
+    assert is_stale(source, target)
+
+
+def test_index_of_another_version_is_stale(source, tmp_path, monkeypatch):
+    target = tmp_path / "words.idx"
+    compile_index(source, target)
+    monkeypatch.setattr(index, "VERSION", index.VERSION + 1)
+    assert is_stale(source, target)
+    with pytest.raises(ValueError, match="unsupported index version"):
+        open_index(target)
+
+
+def test_truncated_index_is_stale(source, tmp_path):
+    target = tmp_path / "words.idx"
+    target.write_bytes(b"LBXIDX")
+    assert is_stale(source, target)
+    with pytest.raises(ValueError, match="truncated"):
+        open_index(target)
+
+    target.write_bytes(b"\0" * HEADER.size)
+    with pytest.raises(ValueError, match="not a dictionary index"):
+        open_index(target)
+
+
+def test_load_index_rebuilds_stale_index(source, tmp_path):
+    target = tmp_path / "words.idx"
+    trie, table = load_index(source, target)
+    assert list(table) == ["abaca", "ace", "bead", "cab", "cede", "dace"]
+    assert not is_stale(source, target)
+
+    source.write_text("\n".join(WORDS + ["bade"]) + "\n")
+    trie, table = load_index(source, target)
+    assert "bade" in list(table)
+    assert not is_stale(source, target)
+
+
+def test_load_index_falls_back_to_memory(source, tmp_path):
+    target = tmp_path / "missing" / "words.idx"
+    trie, table = load_index(source, target)
+    assert list(table) == ["abaca", "ace", "bead", "cab", "cede", "dace"]
+    assert not target.exists()
+
+
+def test_words_with_other_characters_are_skipped(tmp_path):
+    source = tmp_path / "words.txt"
+    source.write_text("Ёлка\nрок-н-ролл\nl'amour\nabc1\nчай\nзима\n")
+    assert read_words(source) == ["зима", "чай", "ёлка"]
+
+
+def test_alphabets_over_64_letters_are_rejected(tmp_path):
+    # cyrillic and latin words together, as in merged word lists
+    source = tmp_path / "mixed.txt"
+    letters = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя" + "abcdefghijklmnopqrstuvwxyz" + "àâçéèêëîïôûüÿæœ"
+    source.write_text("\n".join(letters[i : i + 5] for i in range(0, len(letters), 5)) + "\n")
+    with pytest.raises(ValueError, match=rf"{source} has 74 distinct letters, at most 64"):
+        load_index(source, tmp_path / "mixed.idx")
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from aiogram.types import Chat, Message, Update
+
+from bot.limits import ConcurrencyLimitMiddleware
+
+
+def message(chat_id: int) -> Message:
+    return Message(message_id=1, date=datetime.now(), chat=Chat(id=chat_id, type="private"))
+
+
+class Handler:
+    """
+    Handler that records how many events it handles at once and waits to be released
+    """
+    def __init__(self):
+        self.running = 0
+        self.most_running = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, event, data):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await self.release.wait()
+            return getattr(event, "chat", None) and event.chat.id
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_one_message_per_chat_at_a_time():
+    middleware = ConcurrencyLimitMiddleware(per_chat_limit=1)
+    handler = Handler()
+    tasks = [
+        asyncio.create_task(middleware(handler, message(chat_id), {}))
+        for chat_id in (1, 1, 1, 2)
+    ]
+    await asyncio.sleep(0.01)
+    assert (middleware.active, middleware.waiting) == (2, 2)
+    assert handler.running == 2
+
+    handler.release.set()
+    assert await asyncio.gather(*tasks) == [1, 1, 1, 2]
+    assert handler.most_running == 2
+    assert (middleware.active, middleware.waiting) == (0, 0)
+    # semaphores of chats with nothing in flight are dropped
+    assert middleware._chats == {}
+
+
+@pytest.mark.asyncio
+async def test_global_limit_across_chats():
+    middleware = ConcurrencyLimitMiddleware(global_limit=2, per_chat_limit=None)
+    handler = Handler()
+    tasks = [
+        asyncio.create_task(middleware(handler, message(chat_id), {}))
+        for chat_id in (1, 1, 2, 3)
+    ]
+    await asyncio.sleep(0.01)
+    assert (middleware.active, middleware.waiting) == (2, 2)
+
+    handler.release.set()
+    await asyncio.gather(*tasks)
+    assert handler.most_running == 2
+    assert middleware._chats == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_and_failed_messages_release_slots():
+    middleware = ConcurrencyLimitMiddleware(per_chat_limit=1)
+    handler = Handler()
+    running = asyncio.create_task(middleware(handler, message(1), {}))
+    waiting = asyncio.create_task(middleware(handler, message(1), {}))
+    await asyncio.sleep(0.01)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert (middleware.active, middleware.waiting) == (1, 0)
+    running.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    assert (middleware.active, middleware.waiting) == (0, 0)
+    assert middleware._chats == {}
+
+    async def fail(event, data):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await middleware(fail, message(1), {})
+    assert middleware._chats == {}
+
+
+@pytest.mark.asyncio
+async def test_events_without_chat_are_only_limited_globally():
+    middleware = ConcurrencyLimitMiddleware(per_chat_limit=1)
+    handler = Handler()
+    handler.release.set()
+    assert await middleware(handler, Update(update_id=1), {}) is None
+    assert middleware._chats == {}
@@ -0,0 +1,81 @@
+import pytest
+
+from metrics import Registry
+
+
+@pytest.fixture
+def registry():
+    registry = Registry()
+    registry.counter("jobs_total", "Jobs done", ("job",))
+    registry.gauge("queue_depth", "Jobs queued")
+    registry.histogram("job_seconds", "Job time", buckets=(0.1, 1))
+    return registry
+
+
+def test_diff_has_only_values_recorded_since_snapshot(registry):
+    jobs, queue, seconds = registry.metrics.values()
+    jobs.inc(job="ocr")
+    seconds.observe(0.05)
+    before = registry.snapshot()
+
+    jobs.inc(job="ocr")
+    jobs.inc(2, job="solve")
+    seconds.observe(0.5)
+    queue.set(3)
+    assert registry.diff(before) == {
+        "jobs_total": {("ocr",): 1, ("solve",): 2},
+        "job_seconds": {(): [0, 1, 0, 0.5]},
+    }
+    assert registry.diff(registry.snapshot()) == {}
+
+
+def test_merge_adds_changes_from_another_process(registry):
+    worker = Registry()
+    worker.counter("jobs_total", "Jobs done", ("job",))
+    worker.histogram("job_seconds", "Job time", buckets=(0.1, 1))
+    worker.counter("unknown_total", "Only in the worker")
+    before = worker.snapshot()
+    worker.metrics["jobs_total"].inc(job="ocr")
+    worker.metrics["job_seconds"].observe(2)
+    worker.metrics["unknown_total"].inc()
+
+    registry.metrics["jobs_total"].inc(job="ocr")
+    registry.merge(worker.diff(before))
+    registry.merge(worker.diff(before))
+
+    assert registry.metrics["jobs_total"].get(job="ocr") == 3
+    assert registry.metrics["job_seconds"].values == {(): [0, 0, 2, 4]}
+    assert "unknown_total" not in registry.metrics
+
+
+def test_registering_a_name_twice_returns_the_same_metric(registry):
+    assert registry.counter("jobs_total", "Jobs done", ("job",)) is registry.metrics["jobs_total"]
+    with pytest.raises(ValueError, match="already registered as counter"):
+        registry.gauge("jobs_total", "Jobs done")
+    with pytest.raises(ValueError, match="expects labels"):
+        registry.metrics["jobs_total"].inc()
+
+
+def test_render_prometheus_text_format(registry):
+    jobs, queue, seconds = registry.metrics.values()
+    jobs.inc(job='say "hi"\n')
+    queue.set(2.0)
+    seconds.observe(0.05)
+    seconds.observe(0.25)
+    seconds.observe(5)
+
+    assert registry.render() == (
+        "# HELP jobs_total Jobs done\n"
+        "# TYPE jobs_total counter\n"
+        'jobs_total{job="say \\"hi\\"\\n"} 1\n'
+        "# HELP queue_depth Jobs queued\n"
+        "# TYPE queue_depth gauge\n"
+        "queue_depth 2\n"
+        "# HELP job_seconds Job time\n"
+        "# TYPE job_seconds histogram\n"
+        'job_seconds_bucket{le="0.1"} 1\n'
+        'job_seconds_bucket{le="1"} 2\n'
+        'job_seconds_bucket{le="+Inf"} 3\n'
+        "job_seconds_sum 5.3\n"
+        "job_seconds_count 3\n"
+    )
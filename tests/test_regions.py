@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from ocr.imageregion import ImageRegion
+from ocr.utils import (
+    bounding_square,
+    bounding_squares,
+    intersecting_boxes,
+    rescale_box,
+    rescale_boxes,
+)
+
+
+def random_boxes(seed: int, count: int = 200) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    corners = rng.integers(0, 500, size=(count, 2))
+    sizes = rng.integers(0, 60, size=(count, 2))
+    return np.hstack((corners, corners + sizes)).astype(np.int64)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bounding_squares_match_bounding_square(seed):
+    boxes = random_boxes(seed)
+    expected = [bounding_square(tuple(box)) for box in boxes.tolist()]
+    assert bounding_squares(boxes).tolist() == [list(box) for box in expected]
+
+
+@pytest.mark.parametrize("factor", [1.0, 1.1, 1.25, 0.7])
+def test_rescale_boxes_match_rescale_box(factor):
+    # boxes near the origin grow past it, where truncation goes towards zero
+    boxes = random_boxes(int(factor * 100)) - 20
+    expected = [rescale_box(tuple(box), factor) for box in boxes.tolist()]
+    assert rescale_boxes(boxes, factor).tolist() == [list(box) for box in expected]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_intersecting_boxes_match_region_intersects(seed):
+    boxes = random_boxes(seed, 100)
+    others = random_boxes(seed + 10, 30)
+    regions = [ImageRegion(tuple(box)) for box in boxes.tolist()]
+    other_regions = [ImageRegion(tuple(box)) for box in others.tolist()]
+
+    expected = [any(region.intersects(other) for other in other_regions) for region in regions]
+    assert intersecting_boxes(boxes, others).tolist() == expected
+    # touching boxes intersect
+    assert intersecting_boxes(np.array([[0, 0, 10, 10]]), np.array([[10, 10, 20, 20]])).tolist() == [True]
+    assert intersecting_boxes(boxes, others[:0]).tolist() == [False] * len(boxes)
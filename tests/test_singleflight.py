@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from bot.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_call():
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    flight = SingleFlight("test")
+    results = await asyncio.gather(
+        flight.run("a", work, 1), flight.run("a", work, 1), flight.run("b", work, 2)
+    )
+    assert results == [2, 2, 4]
+    assert calls == [1, 2]
+    assert len(flight) == 0
+
+    # finished calls are not cached
+    assert await flight.run("a", work, 1) == 2
+    assert calls == [1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared_and_key_forgotten():
+    calls = 0
+
+    async def fail():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    flight = SingleFlight("test")
+    results = await asyncio.gather(
+        flight.run("a", fail), flight.run("a", fail), return_exceptions=True
+    )
+    assert [str(result) for result in results] == ["boom", "boom"]
+    assert calls == 1
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def work():
+        started.set()
+        await release.wait()
+        return "done"
+
+    flight = SingleFlight("test")
+    first = asyncio.create_task(flight.run("a", work))
+    second = asyncio.create_task(flight.run("a", work))
+    await started.wait()
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert len(flight) == 1
+
+    release.set()
+    assert await second == "done"
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_call_finishes_when_every_waiter_is_cancelled():
+    release = asyncio.Event()
+    finished = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        finished.set()
+
+    flight = SingleFlight("test")
+    waiter = asyncio.create_task(flight.run("a", work))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    release.set()
+    await asyncio.wait_for(finished.wait(), 1)
+    await asyncio.sleep(0)
+    assert len(flight) == 0
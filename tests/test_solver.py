@@ -0,0 +1,85 @@
+import pytest
+
+from solver import solve
+from solver.dictionary import load_dictionary
+from solver.solver import ENGINES, LetterBoxed, puzzle_from_string
+
+from .conftest import BOARDS
+
+
+def walk_words(board: str) -> list[str]:
+    # board words as found by walking the trie, the reference for `WordTable.board_words`
+    trie = load_dictionary().trie
+    sides = board.split("-")
+    puzzle_mask = trie.letters_mask("".join(sides))
+    next_letters = {}
+    for side in sides:
+        for letter in side:
+            if letter in trie.letter_index:
+                next_letters[trie.letter_index[letter]] = puzzle_mask & ~trie.letters_mask(side)
+    return list(trie.walk(next_letters, puzzle_mask))
+
+
+@pytest.mark.parametrize("board", BOARDS)
+def test_board_words_match_trie_walk(board):
+    puzzle = LetterBoxed(board, load_dictionary())
+    assert puzzle.puzzle_words == walk_words(board)
+
+
+@pytest.mark.parametrize("board", BOARDS)
+def test_engines_find_same_solutions(board, solution_cache):
+    results = {engine: solve(board, (1, 6), engine=engine) for engine in ENGINES}
+    expected_len, expected_count, expected = results["dp"]
+    for engine, (len_threshold, count, solutions) in results.items():
+        assert (len_threshold, count) == (expected_len, expected_count), engine
+        # engines find solutions in different order
+        assert sorted(solutions) == sorted(expected), engine
+
+
+@pytest.mark.parametrize("board", BOARDS)
+def test_engines_rank_solutions_the_same(board, solution_cache):
+    results = {
+        engine: solve(board, (1, 6), engine=engine, limit=20, ranking="letters")
+        for engine in ENGINES
+    }
+    for engine, result in results.items():
+        assert result == results["dp"], engine
+
+
+@pytest.mark.parametrize("ranking", ["letters", "repeats"])
+def test_engines_rank_deeper_solutions_the_same(ranking, solution_cache):
+    # a board with two-word solutions, searched from three words
+    board = "cmu-zoh-sbi-ran"
+    deepening = solve(board, (3, 6), limit=20, ranking=ranking)
+    assert deepening == solve(board, (3, 6), engine="dp", limit=20, ranking=ranking)
+    assert deepening[:2] == (3, 4238)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_limit_and_seed_keep_counts(engine, solution_cache):
+    board = "ybx-ual-ink-toe"
+    len_threshold, count, solutions = solve(board, (3, 6), engine=engine)
+    for kwargs in ({"limit": 5}, {"limit": 5, "seed": 42}):
+        limited = solve(board, (3, 6), engine=engine, **kwargs)
+        assert limited[:2] == (len_threshold, count)
+        assert len(limited[2]) == 5
+        assert all(solution in solutions for solution in limited[2])
+
+    solution_cache.clear()
+    assert solve(board, (3, 6), engine=engine, limit=5, seed=42) == limited
+
+
+@pytest.mark.parametrize("text", ["CMU\nZOH\nSBI\nRAN\n", "CMU ZOH SBI RAN", " cmu-zoh-sbi-ran "])
+def test_puzzle_sides_may_be_separated_by_lines_spaces_or_dashes(text):
+    assert puzzle_from_string(text) == "cmu-zoh-sbi-ran"
+
+
+def test_rejects_boards_that_are_not_12_letters(solution_cache):
+    with pytest.raises(ValueError, match="too many letters for correct puzzle: 13"):
+        solve("cmu-zoh-sbi-rant")
+    with pytest.raises(ValueError, match="not enough letters"):
+        puzzle_from_string("cmu-zoh-sbi")
+    # letters OCR could not recognize are rejected before searching
+    with pytest.raises(ValueError, match="can only have letters, got '1\\?'"):
+        solve("CMU\nZ?H\nSB1\nRAN")
+    assert solution_cache.stats()["misses"] == 0
@@ -0,0 +1,36 @@
+import asyncio
+import os
+import signal
+
+import pytest
+from aiogram import Bot, Dispatcher
+
+from bot import webhook
+
+
+@pytest.mark.asyncio
+async def test_updates_finish_or_are_cancelled_after_timeout():
+    async def handle(seconds):
+        await asyncio.sleep(seconds)
+
+    quick = asyncio.create_task(handle(0.01))
+    slow = asyncio.create_task(handle(10))
+    await webhook._finish_updates({quick, slow}, timeout=0.2)
+    assert quick.done() and not quick.cancelled()
+    assert slow.cancelled()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("signum", [signal.SIGTERM, signal.SIGINT])
+async def test_webhook_stops_on_signal(signum, monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_URL", "")
+    monkeypatch.setattr(webhook, "WEBHOOK_HOST", "127.0.0.1")
+    monkeypatch.setattr(webhook, "WEBHOOK_PORT", 0)
+    server = asyncio.create_task(webhook.run_webhook(Dispatcher(), Bot("123:test")))
+    await asyncio.sleep(0.1)
+    assert not server.done()
+
+    os.kill(os.getpid(), signum)
+    await asyncio.wait_for(server, 5)
+    # handlers are removed again
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+import pytest_asyncio
+
+from bot.workers import POOL_RESTARTS, WorkerPool, WorkerPoolBusy
+from metrics import stage_timer, trace_id
+from metrics.tracing import STAGE_SECONDS
+
+
+# jobs are pickled by reference, so they live at module level
+
+
+def sleep_and_square(x: int, seconds: float = 0.0) -> int:
+    time.sleep(seconds)
+    return x * x
+
+
+def traced_job() -> tuple[int, str]:
+    with stage_timer("test_worker_job"):
+        return os.getpid(), trace_id.get()
+
+
+def exit_worker() -> None:
+    os._exit(1)
+
+
+async def settled(pool: WorkerPool) -> None:
+    # jobs are counted off on the loop, shortly after their result is delivered
+    for _ in range(500):
+        if pool.pending == 0:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{pool.pending} jobs still pending")
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = WorkerPool(processes=1, max_pending=2, timeout=30)
+    # the first job waits for the worker process to start
+    assert await pool.run(sleep_and_square, 2) == 4
+    await settled(pool)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_traced_in_worker_process(pool):
+    count = STAGE_SECONDS.count(stage="test_worker_job")
+    token = trace_id.set("test-trace")
+    try:
+        pid, trace = await pool.run(traced_job)
+    finally:
+        trace_id.reset(token)
+
+    assert pid != os.getpid()
+    assert trace == "test-trace"
+    assert STAGE_SECONDS.count(stage="test_worker_job") == count + 1
+    await settled(pool)
+
+
+@pytest.mark.asyncio
+async def test_jobs_over_max_pending_are_rejected(pool):
+    jobs = [asyncio.create_task(pool.run(sleep_and_square, i, 0.3)) for i in range(2)]
+    await asyncio.sleep(0)
+    assert pool.pending == 2
+
+    with pytest.raises(WorkerPoolBusy):
+        await pool.run(sleep_and_square, 2)
+    assert await asyncio.gather(*jobs) == [0, 1]
+    await settled(pool)
+    assert await pool.run(sleep_and_square, 2) == 4
+
+
+@pytest.mark.asyncio
+async def test_timed_out_job_keeps_its_slot_until_done(pool):
+    pool.max_pending = 1
+    pool.timeout = 0.1
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.run(sleep_and_square, 3, 0.5)
+    # the worker is still running it
+    assert pool.pending == 1
+    with pytest.raises(WorkerPoolBusy):
+        await pool.run(sleep_and_square, 3)
+
+    await settled(pool)
+    pool.timeout = 30
+    assert await pool.run(sleep_and_square, 3) == 9
+
+
+@pytest.mark.asyncio
+async def test_pool_is_replaced_when_a_worker_dies(pool):
+    restarts = POOL_RESTARTS.get()
+    executor = pool._executor
+    with pytest.raises(BrokenProcessPool):
+        await pool.run(exit_worker)
+
+    assert POOL_RESTARTS.get() == restarts + 1
+    assert pool._executor is not executor
+    await settled(pool)
+    # jobs that follow run in the new pool
+    assert await pool.run(sleep_and_square, 4) == 16